@@ -1,31 +1,169 @@
+import argparse
+import array
+import asyncio
+import codecs
+import csv
+import hashlib
+import heapq
+import json
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
 import requests
 import statistics
+from abc import ABC, abstractmethod
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from dataclasses import dataclass, field
-from typing import Optional
+from functools import lru_cache, wraps
+from itertools import count
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import NamedTuple, Optional, Union
 import requests.adapters
-from itertools import product as iterproduct
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from dotenv import dotenv_values
+
+try:
+    import aiohttp            # Moteur de fetch asynchrone (optionnel)
+except ImportError:
+    aiohttp = None
+
+try:
+    import orjson             # Décodage JSON rapide (optionnel)
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec            # Décodage JSON typé (optionnel)
+except ImportError:
+    msgspec = None
+
+try:
+    import numpy as np        # Extraction colonnaire et calculs vectorisés (optionnel)
+except ImportError:
+    np = None
+
+try:
+    import pyarrow as pa      # Sortie Parquet (optionnel)
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
 
 # ─────────────────────────────────────────────
 # CONFIG
 # ─────────────────────────────────────────────
-API_KEY          = 'c8e0590a71042982b6ec3a866f1d72ac'
-REGIONS          = 'uk'
+ENV_FILE         = '.env'     # ODDS_API_KEYS=k1,k2,... (ou ODDS_API_KEY=k), l'environnement est prioritaire
+API_BASE_URL     = os.environ.get('ODDS_API_BASE_URL', 'https://api.the-odds-api.com/v4')
+REGIONS          = 'uk'       # Une ou plusieurs régions séparées par des virgules (uk,eu,us,au)
+SPLIT_REGIONS    = False      # True : un appel par région puis fusion par événement
 MARKETS          = 'h2h,spreads,totals'
 TOTAL_INVESTMENT = 100        # Mise totale en €
 MIN_PROFIT_PCT   = -5         # Affiche aussi les quasi-surebets (ex: -5% = margin < 105%)
 TOP_N            = 30         # Nombre max de résultats affichés
 MAX_WORKERS      = 8
+FETCH_ENGINE     = 'async'    # 'async' (aiohttp) ou 'threads' (ThreadPoolExecutor)
+ASYNC_CONCURRENCY = 64        # Requêtes simultanées max en mode async
+REQUEST_TIMEOUT  = 10         # Timeout par requête (secondes)
+KEEPALIVE_TIMEOUT = 30        # Durée de vie des connexions keep-alive (secondes)
+STREAM_CHUNK_SIZE = 64 * 1024 # Taille des blocs lus en mode --stream (octets)
+JSON_BACKEND     = 'auto'     # 'auto' (msgspec > orjson > json), 'msgspec', 'orjson' ou 'json'
+OUTLIER_RULE     = 'zscore'   # 'zscore' (moyenne / écart-type) ou 'mad' (médiane / MAD, robuste)
 OUTLIER_Z_SCORE  = 3.0
+OUTLIER_MAD_THRESHOLD = 3.5   # Seuil du z-score modifié 0.6745·|x - médiane| / MAD (Iglewicz-Hoaglin)
 KELLY_FRACTION   = 0.25       # Kelly fractionné (25%)
+CONSENSUS_ENABLED = False     # Probabilités justes dé-margées (Kelly, value bets) : --consensus, --value-bets, --daemon
+CONSENSUS_MIN_BOOKS = 3       # Books complets requis avant de se fier au consensus d'un marché
+SHARP_BOOKMAKERS = frozenset({'pinnacle', 'betfair_ex_eu', 'betfair_ex_uk', 'matchbook', 'smarkets'})
+SHARP_WEIGHT     = 1.0        # Poids d'un book sharp dans le consensus (1 : moyenne simple ; grand : ancré)
+MAX_EXPOSURE     = 1.0        # Part de la bankroll (TOTAL_INVESTMENT) engagée au plus sur tous les marchés ouverts
+SEARCH_VALUE     = False      # Value bets : cote au-dessus du prix juste du consensus (--value-bets, requiert CONSENSUS_ENABLED)
+MIN_VALUE_EDGE_PCT = 2.0      # Espérance minimale d'un value bet (en %)
 MAX_PROFIT_PCT   = 50         # Ignore les cotes trop belles (probables erreurs)
+LINE_MARKETS     = {          # Marchés à lignes, découpés en sous-marchés à deux issues par ligne
+    'spreads': 'spreads', 'alternate_spreads': 'spreads',
+    'totals': 'totals', 'alternate_totals': 'totals',
+}
+TOPK_QUOTES      = 5          # Cotes gardées par outcome pour la recherche sous contraintes
+SEARCH_MIDDLES   = False      # Recherche des middles / surebets inter-lignes (--middles)
+MIDDLE_MAX_LOSS_PCT = 2.0     # Perte garantie maximale tolérée pour un middle (en %)
+
+# Fenêtres temporelles (commenceTimeFrom / commenceTimeTo), en heures depuis maintenant
+COMMENCE_WINDOW  = None       # (de, à) pour les sweeps ponctuels ; None = pas de borne
+EVENT_IDS        = None       # Ids d'événements à suivre (eventIds) ; None = tous
+DAEMON_WINDOWS   = [          # Fenêtres pollées séparément en mode daemon
+    (None, 6),                # Matchs en cours et dans les 6h : polling rapide
+    (6, None),                # Au-delà : polling lent
+]
+
+# Mode daemon : intervalle de polling selon le délai avant le prochain match
+POLL_TIERS = [                # (match dans moins de N secondes, intervalle en secondes)
+    (3600,      30),          # < 1h (ou déjà commencé)
+    (6 * 3600,  120),         # < 6h
+    (24 * 3600, 600),         # < 24h
+]
+POLL_IDLE_INTERVAL      = 1800  # Sports sans match dans les 24h
+SPORTS_REFRESH_INTERVAL = 3600  # Rafraîchissement de la liste /v4/sports
+
+# Suivi des événements "chauds" (quasi-surebets) via /events/{id}/odds en mode daemon
+HOT_MIN_PROFIT_PCT  = -1.0    # Un résultat au-dessus de ce profit est suivi de près
+HOT_DROP_PROFIT_PCT = -2.5    # En dessous, le poll compte comme un raté
+HOT_MAX_MISSES      = 3       # Ratés consécutifs avant abandon du suivi
+HOT_INTERVALS       = [5, 15, 60]   # Intervalles de re-poll (secondes) par niveau d'escalade
+HOT_MAX_EVENTS      = 50      # Événements suivis simultanément au maximum
+
+# Quota The-Odds-API : coût d'un appel /odds = nb marchés × nb régions
+QUOTA_SWEEP_BUDGET = 500      # Unités de quota max dépensées par sweep
+QUOTA_RESERVE      = 50       # Unités jamais dépensées (marge de sécurité)
+YIELD_EWMA_ALPHA   = 0.3      # Lissage du rendement attendu par sport
+
+# Circuit breaker par sport (erreurs HTTP / réseau répétées)
+BREAKER_THRESHOLD  = 3        # Échecs consécutifs avant ouverture du circuit
+BACKOFF_BASE       = 30       # Première mise à l'écart (secondes), doublée à chaque échec ; au moins l'intervalle du sport
+BACKOFF_MAX        = 1800     # Mise à l'écart maximale (secondes), sauf sport déjà pollé moins souvent
+
+# Instrumentation (temps et compteurs par étape)
+METRICS_ENABLED  = False      # Activé par --metrics, --metrics-json ou --metrics-port
+METRICS_HOST     = '127.0.0.1'
+
+# Sorties en flux des résultats (--jsonl, --csv, --parquet)
+SINK_BUFFER_SIZE = 1 << 20    # Tampon d'écriture JSONL / CSV (octets)
+PARQUET_ROW_GROUP = 10_000    # Lignes (jambes) par row group Parquet
+
+# Cache disque des réponses /odds (développement / réglage)
+CACHE_ENABLED    = False      # Activé par --cache ou --replay
+CACHE_DIR        = os.path.join('.cache', 'odds')
+CACHE_TTL        = 300        # Durée de validité d'une entrée (secondes)
 
 
 # ─────────────────────────────────────────────
 # DATA CLASSES
 # ─────────────────────────────────────────────
-@dataclass
+@dataclass(frozen=True)
+class BookmakerConstraints:
+    """Bookmakers jouables : comptes limités / fermés exclus, jambes par bookmaker plafonnées."""
+    allowed: Optional[frozenset] = None           # None : tous les bookmakers
+    excluded: frozenset = frozenset()
+    max_legs_per_bookie: Optional[int] = None     # 1 : jamais deux jambes chez le même bookmaker
+
+    def active(self) -> bool:
+        return self.allowed is not None or bool(self.excluded) or self.max_legs_per_bookie is not None
+
+    def usable(self, bookie: str) -> bool:
+        return bookie not in self.excluded and (self.allowed is None or bookie in self.allowed)
+
+
+# Contraintes actives (--bookmakers, --exclude-bookmakers, --max-legs-per-bookmaker)
+CONSTRAINTS = BookmakerConstraints()
+
+
+# Slots : pas de __dict__ par instance (des centaines de milliers d'Outcome par sweep).
+# Les chaînes répétées (bookmakers, équipes, marchés) sont internées à l'extraction.
+@dataclass(slots=True)
 class Outcome:
     name: str
     price: float
@@ -33,58 +171,788 @@ class Outcome:
     point: Optional[float] = None
 
 
-@dataclass
+class Bet(NamedTuple):
+    """Jambe d'un résultat : tuple nommé, sans dict ni clés répétées par pari. Mise et gain bruts, arrondis à l'affichage."""
+    outcome: str
+    point: Optional[float]
+    bookie: str
+    cote: float
+    mise: float
+    gain: float
+
+
+@dataclass(slots=True)
 class ArbitrageResult:
     sport: str
     match: str
-    commence: str
+    commence: str                     # commence_time brut (ISO 8601), formaté à l'affichage
     market: str
     profit_pct: float
     profit_eur: float
     margin: float
-    bets: list = field(default_factory=list)
+    bets: tuple = ()                  # (Bet, ...)
     is_surebet: bool = False
-    kelly_stakes: Optional[dict] = None
+    kelly_stakes: Optional[dict] = None   # {outcome: mise Kelly brute en €}
+    event_id: Optional[str] = None
+    line: Optional[float] = None      # Ligne spreads (côté domicile) / totals ; None pour h2h
+    middle_pct: Optional[float] = None  # Middle : profit (%) si le score tombe entre les deux lignes
+    fair_price: Optional[float] = None  # Value bet : cote juste du consensus (profit_pct = espérance)
+
+
+# ─────────────────────────────────────────────
+# INSTRUMENTATION
+# ─────────────────────────────────────────────
+def _prom_labels(**labels) -> str:
+    """Labels Prometheus 'k="v",...' (antislash et guillemets échappés)."""
+    def escape(value) -> str:
+        return str(value).replace('\\', '\\\\').replace('"', '\\"')
+    return ','.join(f'{k}="{escape(v)}"' for k, v in labels.items())
+
+
+class Metrics:
+    """
+    Temps et compteurs par étape (fetch, decode, extract, filter_outliers,
+    compute_arbitrage, display), plus le détail des fetchs par sport (requêtes
+    par statut HTTP, octets, temps). Thread-safe ; inactif (coût quasi nul)
+    tant que METRICS_ENABLED est faux. Export JSON et texte Prometheus.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self.stages: dict = {}        # étape -> [appels, secondes cumulées, max]
+            self.counters: dict = {}      # nom -> valeur
+            self.fetches: dict = {}       # sport -> {'status': {code: n}, 'bytes', 'seconds'}
+
+    def observe(self, stage: str, seconds: float):
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            st = self.stages.get(stage)
+            if st is None:
+                self.stages[stage] = [1, seconds, seconds]
+            else:
+                st[0] += 1
+                st[1] += seconds
+                if seconds > st[2]:
+                    st[2] = seconds
+
+    @contextmanager
+    def timer(self, stage: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - t0)
+
+    def inc(self, name: str, value: int = 1):
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def record_fetch(self, sport: str, status, nbytes: int, seconds: float):
+        """Une requête HTTP d'un sport ; status 'error' pour une erreur réseau."""
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            f = self.fetches.setdefault(sport, {'status': {}, 'bytes': 0, 'seconds': 0.0})
+            f['status'][str(status)] = f['status'].get(str(status), 0) + 1
+            f['bytes'] += nbytes
+            f['seconds'] += seconds
+        self.observe('fetch', seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'uptime_seconds': round(time.time() - self.started, 3),
+                'stages': {
+                    stage: {'calls': n, 'seconds': round(total, 6), 'max_seconds': round(peak, 6),
+                            'mean_us': round(total / n * 1e6, 2)}
+                    for stage, (n, total, peak) in self.stages.items()
+                },
+                'counters': dict(self.counters),
+                'fetch': {
+                    sport: {'status': dict(f['status']), 'bytes': f['bytes'], 'seconds': round(f['seconds'], 6)}
+                    for sport, f in self.fetches.items()
+                },
+                'quota': {'used': QUOTA.used, 'remaining': QUOTA.remaining},
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2, ensure_ascii=False)
+
+    def to_prometheus(self) -> str:
+        snap = self.snapshot()
+        lines = []
+
+        def metric(name, kind, help_, samples):
+            lines.append(f"# HELP arbitrage_{name} {help_}")
+            lines.append(f"# TYPE arbitrage_{name} {kind}")
+            for labels, value in samples:
+                lines.append(f"arbitrage_{name}{{{labels}}} {value}" if labels else f"arbitrage_{name} {value}")
+
+        stages = snap['stages']
+        metric('stage_calls_total', 'counter', "Appels par étape",
+               [(_prom_labels(stage=k), v['calls']) for k, v in stages.items()])
+        metric('stage_seconds_total', 'counter', "Temps cumulé par étape (secondes)",
+               [(_prom_labels(stage=k), v['seconds']) for k, v in stages.items()])
+        metric('stage_seconds_max', 'gauge', "Appel le plus long par étape (secondes)",
+               [(_prom_labels(stage=k), v['max_seconds']) for k, v in stages.items()])
+        metric('fetch_requests_total', 'counter', "Requêtes HTTP par sport et statut",
+               [(_prom_labels(sport=sport, status=code), n)
+                for sport, f in snap['fetch'].items() for code, n in f['status'].items()])
+        metric('fetch_bytes_total', 'counter', "Octets reçus par sport",
+               [(_prom_labels(sport=sport), f['bytes']) for sport, f in snap['fetch'].items()])
+        metric('fetch_seconds_total', 'counter', "Temps de fetch cumulé par sport (secondes)",
+               [(_prom_labels(sport=sport), f['seconds']) for sport, f in snap['fetch'].items()])
+        for name, value in snap['counters'].items():
+            metric(f"{name}_total", 'counter', name, [('', value)])
+        for name, value in snap['quota'].items():
+            if value is not None:
+                metric(f"quota_{name}", 'gauge', f"Quota API {name}", [('', value)])
+        return '\n'.join(lines) + '\n'
+
+    def report(self):
+        snap = self.snapshot()
+        print(f"\n⏱  Instrumentation ({snap['uptime_seconds']:.2f}s)")
+        for stage, v in sorted(snap['stages'].items(), key=lambda kv: -kv[1]['seconds']):
+            print(f"   {stage:<18} {v['calls']:8d} appels  {v['seconds'] * 1000:10.1f} ms  "
+                  f"(moy. {v['mean_us']:8.1f} µs, max {v['max_seconds'] * 1000:7.1f} ms)")
+        total_bytes = sum(f['bytes'] for f in snap['fetch'].values())
+        statuses: dict = {}
+        for f in snap['fetch'].values():
+            for code, n in f['status'].items():
+                statuses[code] = statuses.get(code, 0) + n
+        if statuses:
+            codes = ', '.join(f"{code}×{n}" for code, n in sorted(statuses.items()))
+            print(f"   fetch : {len(snap['fetch'])} sport(s), {total_bytes / 1e6:.2f} Mo, statuts {codes}")
+        for name, value in snap['counters'].items():
+            print(f"   {name:<18} {value:8d}")
+
+
+METRICS = Metrics()
+
+
+def instrumented(stage: str):
+    """Décorateur : temps de chaque appel ajouté à l'étape `stage` de METRICS."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not METRICS_ENABLED:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                METRICS.observe(stage, time.perf_counter() - t0)
+        return wrapper
+    return decorator
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """GET /metrics (texte Prometheus) et /metrics.json."""
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split('?')[0] == '/metrics':
+            body, ctype = METRICS.to_prometheus(), 'text/plain; version=0.0.4; charset=utf-8'
+        elif self.path.split('?')[0] == '/metrics.json':
+            body, ctype = METRICS.to_json(), 'application/json'
+        else:
+            self.send_error(404)
+            return
+        data = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', ctype)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def serve_metrics(port: int, host: str = None) -> ThreadingHTTPServer:
+    """Démarre l'endpoint de métriques dans un thread démon ; retourne le serveur."""
+    server = ThreadingHTTPServer((host or METRICS_HOST, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ─────────────────────────────────────────────
+# CLÉS API (POOL EN ROTATION)
+# ─────────────────────────────────────────────
+def load_api_keys(env_file: str = ENV_FILE) -> list:
+    """Clés de ODDS_API_KEYS (ou ODDS_API_KEY), environnement puis .env ; liste vide si aucune."""
+    dotenv = dotenv_values(env_file)
+    raw = (os.environ.get('ODDS_API_KEYS') or dotenv.get('ODDS_API_KEYS')
+           or os.environ.get('ODDS_API_KEY') or dotenv.get('ODDS_API_KEY') or '')
+    return list(dict.fromkeys(k for k in re.split(r'[,\s]+', raw) if k))
+
+
+@dataclass
+class ApiKeyState:
+    key: str
+    used: Optional[int] = None        # x-requests-used de la dernière réponse
+    remaining: Optional[int] = None   # x-requests-remaining de la dernière réponse
+    requests: int = 0                 # Requêtes envoyées avec cette clé
+    errors: int = 0                   # Réponses 401 / 429 reçues
+    cooldown_until: float = 0.0       # Limitée en débit (429) jusqu'à (time.monotonic)
+    exhausted: bool = False           # Quota épuisé ou clé refusée : hors rotation
+
+    @property
+    def label(self) -> str:
+        return f"…{self.key[-4:]}"
+
+
+class KeyPool:
+    """
+    Répartit les requêtes entre plusieurs clés API en round-robin et suit,
+    par clé, la consommation lue dans les en-têtes x-requests-*. Une clé dont
+    le quota restant ne couvre plus un appel /odds, ou refusée (401), sort
+    de la rotation ; une clé limitée en débit (429) est mise en pause pour la
+    durée du Retry-After pendant que les autres prennent le relais. Toutes les
+    clés en pause : aucune requête tant que la première pause n'a pas expiré.
+    """
+
+    def __init__(self, keys: list):
+        self._lock = threading.Lock()
+        self.keys = {k: ApiKeyState(k) for k in keys}
+        self._order = list(self.keys)
+        self._next = 0
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def available(self) -> bool:
+        """Au moins une clé ni épuisée ni en pause 429."""
+        now = time.monotonic()
+        return any(not s.exhausted and s.cooldown_until <= now for s in self.keys.values())
+
+    def cooldown(self) -> float:
+        """Secondes avant qu'une clé soit utilisable (0 si l'une l'est déjà, inf si toutes épuisées)."""
+        with self._lock:
+            pauses = [s.cooldown_until for s in self.keys.values() if not s.exhausted]
+        return max(min(pauses) - time.monotonic(), 0.0) if pauses else math.inf
+
+    def acquire(self) -> Optional[str]:
+        """Clé suivante en rotation parmi celles ni épuisées ni en pause ; None s'il n'y en a pas."""
+        with self._lock:
+            now = time.monotonic()
+            n = len(self._order)
+            for i in range(n):
+                state = self.keys[self._order[(self._next + i) % n]]
+                if not state.exhausted and state.cooldown_until <= now:
+                    self._next = (self._next + i + 1) % n
+                    state.requests += 1
+                    return state.key
+            return None
+
+    def update(self, key: Optional[str], status: int, headers, cost: Optional[int] = None) -> bool:
+        """
+        Enregistre la réponse obtenue avec `key` pour un appel de coût `cost`
+        (nominal_request_cost par défaut) : la clé sort de la rotation quand son
+        quota restant ne couvre plus un tel appel. Retourne True si l'échec est
+        imputable à la clé (401 / 429) : la clé est écartée ou mise en pause, ce
+        qui suspend les requêtes de tous les sports si c'était la dernière ; le
+        sport n'a pas à être pénalisé.
+        """
+        state = self.keys.get(key)
+        if state is None:
+            return False
+        used = headers.get('x-requests-used')
+        remaining = headers.get('x-requests-remaining')
+        with self._lock:
+            if used is not None:
+                state.used = int(float(used))
+            if remaining is not None:
+                state.remaining = int(float(remaining))
+            if state.remaining is not None and state.remaining < (cost or nominal_request_cost()):
+                state.exhausted = True
+            if status not in (401, 429):
+                return False
+            state.errors += 1
+            if status == 401:
+                state.exhausted = True
+            else:
+                delay = parse_retry_after(headers.get('Retry-After'))
+                state.cooldown_until = time.monotonic() + (BACKOFF_BASE if delay is None else delay)
+            return True
+
+    def totals(self) -> tuple:
+        """(utilisé, restant) cumulés ; restant inconnu tant qu'une clé active n'a pas répondu."""
+        with self._lock:
+            states = list(self.keys.values())
+            active = [s for s in states if not s.exhausted]
+            used = sum(s.used for s in states if s.used is not None) \
+                if any(s.used is not None for s in states) else None
+            if any(s.remaining is None for s in active):
+                return used, None
+            return used, sum(s.remaining for s in active)
+
+    def report(self):
+        for s in self.keys.values():
+            status = "épuisée" if s.exhausted else (
+                "en pause" if s.cooldown_until > time.monotonic() else "active")
+            print(f"   🔑 {s.label}  {s.requests:5d} requêtes  utilisé {s.used if s.used is not None else '?':>6}  "
+                  f"restant {s.remaining if s.remaining is not None else '?':>6}  ({status})")
+
+
+KEYS = KeyPool(load_api_keys())
+
+
+# ─────────────────────────────────────────────
+# QUOTA & PLANIFICATION DES REQUÊTES
+# ─────────────────────────────────────────────
+def nominal_request_cost() -> int:
+    """Coût théorique d'un appel /odds : nb marchés × nb régions."""
+    return len(MARKETS.split(',')) * len(REGIONS.split(','))
+
+
+def request_cost(params: dict) -> int:
+    """Coût d'un appel d'après ses paramètres (une seule région en --split-regions)."""
+    return len(params['markets'].split(',')) * len(params['regions'].split(','))
+
+
+class QuotaScheduler:
+    """
+    Suit le quota restant cumulé du pool de clés (KEYS), budgétise les appels d'un sweep et classe les sports par rendement attendu
+    (moyenne exponentielle des profits trouvés par unité de quota).
+    Thread-safe : partagé par les moteurs threads, async et daemon.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.used: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.sport_cost: dict = {}      # sport -> coût observé (x-requests-last)
+        self.sport_yield: dict = {}     # sport -> rendement attendu (EWMA)
+
+    def update(self, headers, sport: Optional[str] = None):
+        """À appeler après KEYS.update : le restant est la somme des clés actives."""
+        last = headers.get('x-requests-last')
+        used, remaining = KEYS.totals()
+        with self._lock:
+            self.used, self.remaining = used, remaining
+            if sport is not None and last is not None:
+                self.sport_cost[sport] = int(float(last))
+
+    def cost(self, sport: str) -> int:
+        cost = self.sport_cost.get(sport)
+        # Un sport sans événement coûte 0 : on garde le coût nominal comme borne prudente
+        return cost if cost else nominal_request_cost()
+
+    def can_spend(self, sport: str) -> bool:
+        with self._lock:
+            if self.remaining is None:
+                return True
+            return self.remaining - self.cost(sport) >= QUOTA_RESERVE
+
+    def record_yield(self, sport: str, results: list):
+        # Seuls les arbitrages comptent : le profit_pct d'un value bet est une espérance
+        gain = sum(max(r.profit_pct - MIN_PROFIT_PCT, 0.0) for r in results if r.fair_price is None)
+        observed = gain / self.cost(sport)
+        with self._lock:
+            prev = self.sport_yield.get(sport)
+            self.sport_yield[sport] = observed if prev is None else (
+                YIELD_EWMA_ALPHA * observed + (1 - YIELD_EWMA_ALPHA) * prev
+            )
+
+    def expected_yield(self, sport: str) -> float:
+        if sport in self.sport_yield:
+            return self.sport_yield[sport]
+        # Sport jamais scanné : rendement moyen observé (ou prior optimiste)
+        if self.sport_yield:
+            return statistics.mean(self.sport_yield.values())
+        return 1.0
+
+    def plan(self, items: list, key=None) -> tuple:
+        """
+        Sélectionne les sports à fetcher pour ce sweep, par rendement attendu
+        décroissant, dans la limite du budget. Retourne (sélectionnés, ignorés).
+        `key` extrait le sport d'un élément (ex : couples (sport, fenêtre) du daemon).
+        """
+        key = key or (lambda item: item)
+        with self._lock:
+            budget = QUOTA_SWEEP_BUDGET
+            if self.remaining is not None:
+                budget = min(budget, self.remaining - QUOTA_RESERVE)
+            ranked = sorted(items, key=lambda item: self.expected_yield(key(item)), reverse=True)
+            selected, skipped = [], []
+            for item in ranked:
+                cost = self.cost(key(item))
+                if cost <= budget:
+                    selected.append(item)
+                    budget -= cost
+                else:
+                    skipped.append(item)
+        return selected, skipped
+
+
+QUOTA = QuotaScheduler()
+
+
+def _report_skipped(skipped: list):
+    if skipped:
+        print(f"   ⚠ Quota : {len(skipped)} sport(s) à faible rendement ignoré(s) "
+              f"(restant : {QUOTA.remaining})")
+
+
+# ─────────────────────────────────────────────
+# SANTÉ DES SPORTS (CIRCUIT BREAKER)
+# ─────────────────────────────────────────────
+def parse_retry_after(value) -> Optional[float]:
+    """En-tête Retry-After (secondes ou date HTTP) → délai en secondes."""
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max((parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class SportHealth:
+    failures: int = 0                 # Échecs consécutifs
+    open_until: float = 0.0           # Circuit ouvert jusqu'à (time.monotonic)
+    probing: bool = False             # Requête d'essai en cours (half-open)
+
+
+class CircuitBreaker:
+    """
+    État de santé par sport. Après BREAKER_THRESHOLD échecs consécutifs le
+    circuit s'ouvre pour un backoff exponentiel (avec jitter) ; un 429 ouvre
+    immédiatement pour la durée du Retry-After, un 422 (marchés non supportés)
+    pour BACKOFF_MAX. À l'échéance, une seule requête d'essai est autorisée :
+    succès → circuit refermé, échec → backoff doublé. Le backoff part de
+    l'intervalle de polling normal du sport (set_interval) : un sport en échec
+    n'est jamais re-pollé plus souvent que sain.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.health: dict = {}
+        self.intervals: dict = {}     # sport -> intervalle de polling normal (secondes)
+
+    def set_interval(self, sport: str, seconds: float):
+        self.intervals[sport] = seconds
+
+    def base_delay(self, sport: str) -> float:
+        """Premier palier du backoff : BACKOFF_BASE, ou l'intervalle du sport s'il est plus long."""
+        return max(BACKOFF_BASE, self.intervals.get(sport, 0.0))
+
+    def allow(self, sport: str) -> bool:
+        with self._lock:
+            h = self.health.get(sport)
+            if h is None or h.open_until == 0.0:
+                return True
+            if h.probing or time.monotonic() < h.open_until:
+                return False
+            h.probing = True
+            return True
+
+    def remaining(self, sport: str) -> float:
+        """Secondes avant la prochaine requête autorisée (0 si circuit fermé)."""
+        h = self.health.get(sport)
+        return max(h.open_until - time.monotonic(), 0.0) if h else 0.0
+
+    def retry_delay(self, sport: str) -> Optional[float]:
+        """Délai avant de re-poller un sport en échec (None si sain)."""
+        h = self.health.get(sport)
+        if h is None:
+            return None
+        if not h.open_until:
+            return self.base_delay(sport)
+        # Échéance passée mais requête d'essai en cours : pas de re-poll immédiat
+        return self.remaining(sport) or (self.base_delay(sport) if h.probing else 0.0)
+
+    def is_open(self, sport: str) -> bool:
+        h = self.health.get(sport)
+        return h is not None and h.open_until > time.monotonic()
+
+    def release(self, sport: str):
+        """Libère la requête d'essai sans verdict (échec imputable à la clé, événement disparu)."""
+        with self._lock:
+            h = self.health.get(sport)
+            if h is not None:
+                h.probing = False
+
+    def record_success(self, sport: str):
+        with self._lock:
+            self.health.pop(sport, None)
+
+    def record_failure(self, sport: str, status: Optional[int] = None, retry_after=None):
+        with self._lock:
+            h = self.health.setdefault(sport, SportHealth())
+            h.failures += 1
+            h.probing = False
+            delay = None
+            if status == 429:
+                delay = parse_retry_after(retry_after)
+                if delay is None:
+                    delay = BACKOFF_BASE
+            elif status == 422:
+                delay = BACKOFF_MAX
+            elif h.failures >= BREAKER_THRESHOLD:
+                base = self.base_delay(sport)
+                delay = min(base * 2 ** (h.failures - BREAKER_THRESHOLD), max(BACKOFF_MAX, base))
+                delay *= random.uniform(0.8, 1.2)
+            if delay is not None:
+                h.open_until = time.monotonic() + delay
+
+
+BREAKER = CircuitBreaker()
+
+
+def request_key(sport: str) -> Optional[str]:
+    """
+    Clé API d'un appel /odds du sport, None si l'appel est refusé : aucune clé
+    utilisable (épuisées ou en pause 429), quota insuffisant ou circuit ouvert.
+    """
+    # Quota d'abord : allow() consomme la requête d'essai d'un circuit half-open
+    if not (KEYS.available() and QUOTA.can_spend(sport) and BREAKER.allow(sport)):
+        return None
+    key = KEYS.acquire()
+    if key is None:
+        BREAKER.release(sport)        # Dernière clé mise en pause entre-temps
+    return key
+
+
+def record_quota(key: Optional[str], status: int, headers, sport: Optional[str] = None,
+                 cost: Optional[int] = None) -> bool:
+    """Met à jour la clé utilisée puis le quota global ; True si l'échec incombe à la clé."""
+    key_failure = KEYS.update(key, status, headers, cost)
+    QUOTA.update(headers, sport)
+    return key_failure
+
+
+def record_response(sport: str, status: int, headers, key: Optional[str] = None,
+                    track_cost: bool = True, cost: Optional[int] = None) -> bool:
+    """
+    Met à jour clé, quota et santé du sport ; True si la réponse est exploitable.
+    track_cost=False pour les appels partiels (une région, un événement) dont le
+    coût ne représente pas celui d'un appel /odds complet du sport ; cost est
+    alors leur coût réel (request_cost).
+    """
+    key_failure = record_quota(key, status, headers, sport if track_cost else None, cost)
+    if status == 200:
+        BREAKER.record_success(sport)
+        return True
+    if key_failure:
+        BREAKER.release(sport)
+    else:
+        BREAKER.record_failure(sport, status, headers.get('Retry-After'))
+    return False
+
+
+def plan_sweep(sports: list) -> list:
+    """Écarte les sports au circuit ouvert puis applique le budget quota."""
+    healthy = [s for s in sports if not BREAKER.is_open(s)]
+    if len(healthy) < len(sports):
+        print(f"   ⚠ Circuit ouvert : {len(sports) - len(healthy)} sport(s) mis à l'écart")
+    selected, skipped = QUOTA.plan(healthy)
+    _report_skipped(skipped)
+    return selected
+
+
+# ─────────────────────────────────────────────
+# CACHE DISQUE DES RÉPONSES
+# ─────────────────────────────────────────────
+def cache_key(sport: str, regions: str = None, markets: str = None, window=None) -> str:
+    """Clé de contenu : hash de (sport, régions, marchés, fenêtre relative, eventIds)."""
+    regions = regions or REGIONS
+    markets = markets or MARKETS
+    raw = json.dumps([sport, regions, markets, resolve_window(window), EVENT_IDS])
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]
+
+
+def cache_get(sport: str, window=None, regions: str = None) -> Optional[list]:
+    """Retourne les événements en cache s'ils ont moins de CACHE_TTL secondes."""
+    if not CACHE_ENABLED:
+        return None
+    path = os.path.join(CACHE_DIR, cache_key(sport, regions, window=window) + '.json')
+    try:
+        if time.time() - os.path.getmtime(path) > CACHE_TTL:
+            return None
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)['events']
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def cache_put(sport: str, events: list, window=None, regions: str = None):
+    """Écrit la réponse brute d'un sport (écriture atomique via fichier temporaire)."""
+    if not CACHE_ENABLED:
+        return
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = os.path.join(CACHE_DIR, cache_key(sport, regions, window=window) + '.json')
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    snapshot = {
+        'sport':      sport,
+        'regions':    regions or REGIONS,
+        'markets':    MARKETS,
+        'window':     resolve_window(window),
+        'fetched_at': datetime.now(timezone.utc).isoformat(),
+        'events':     events,
+    }
+    try:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"   ✗ Cache : écriture impossible pour {sport} : {e}")
+
+
+def load_cached_events() -> list:
+    """
+    Mode replay : recharge tous les snapshots du cache correspondant aux
+    REGIONS/MARKETS courants, sans tenir compte du TTL ni faire d'appel réseau.
+    Les snapshots d'un même sport (fenêtres, régions séparées) sont fusionnés
+    par événement avec merge_region_events.
+    """
+    all_events = []
+    if not os.path.isdir(CACHE_DIR):
+        return all_events
+    accepted_regions = {REGIONS, *split_regions()}
+    payloads: dict = {}               # sport -> [(fetched_at, événements), ...]
+    for fname in sorted(os.listdir(CACHE_DIR)):
+        if not fname.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(CACHE_DIR, fname), encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if snapshot.get('regions') not in accepted_regions or snapshot.get('markets') != MARKETS:
+            continue
+        payloads.setdefault(snapshot.get('sport', '?'), []).append(
+            (snapshot.get('fetched_at', '?'), snapshot.get('events', []))
+        )
+    for sport, snapshots in payloads.items():
+        events = merge_region_events([evts for _, evts in snapshots])
+        for event in events:
+            event['_sport'] = sport
+        all_events.extend(events)
+        if events:
+            fetched_at = max(ts for ts, _ in snapshots)
+            print(f"   ✓ {sport}: {len(events)} événements (cache {fetched_at})")
+    return all_events
 
 
 # ─────────────────────────────────────────────
 # FETCHING
 # ─────────────────────────────────────────────
 def fetch_sports(session):
+    key = KEYS.acquire()
+    if key is None:
+        print("   ✗ Aucune clé API utilisable (quotas épuisés ou clés en pause).")
+        return []
+    t0 = time.perf_counter()
     try:
         resp = session.get(
-            'https://api.the-odds-api.com/v4/sports',
-            params={'apiKey': API_KEY},
-            timeout=10
+            f'{API_BASE_URL}/sports',
+            params={'apiKey': key},
+            timeout=REQUEST_TIMEOUT
         )
+        METRICS.record_fetch('_sports', resp.status_code, len(resp.content), time.perf_counter() - t0)
+        record_quota(key, resp.status_code, resp.headers)
         resp.raise_for_status()
-        return [s['key'] for s in resp.json() if s.get('active')]
+        return [s['key'] for s in json_loads(resp.content) if s.get('active')]
     except requests.RequestException as e:
+        METRICS.record_fetch('_sports', 'error', 0, time.perf_counter() - t0)
         print(f"   ✗ Erreur récupération sports : {e}")
         return []
 
 
-def fetch_sport_odds(sport, session):
-    url = f'https://api.the-odds-api.com/v4/sports/{sport}/odds'
+def resolve_window(window=None) -> Optional[tuple]:
+    """Fenêtre effective : celle passée en argument, sinon COMMENCE_WINDOW."""
+    window = window if window is not None else COMMENCE_WINDOW
+    if window is None or window == (None, None):
+        return None
+    return tuple(window)
+
+
+def window_params(window=None) -> dict:
+    """Paramètres commenceTimeFrom/commenceTimeTo/eventIds d'une fenêtre (heures relatives)."""
+    params = {}
+    window = resolve_window(window)
+    if window is not None:
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        start, end = window
+        if start is not None:
+            params['commenceTimeFrom'] = (now + timedelta(hours=start)).strftime('%Y-%m-%dT%H:%M:%SZ')
+        if end is not None:
+            params['commenceTimeTo'] = (now + timedelta(hours=end)).strftime('%Y-%m-%dT%H:%M:%SZ')
+    if EVENT_IDS:
+        params['eventIds'] = ','.join(EVENT_IDS)
+    return params
+
+
+def odds_request(sport: str, key: str, window=None, regions: str = None) -> tuple:
+    """
+    URL et paramètres de l'appel /odds d'un sport avec la clé `key` obtenue de
+    request_key, une fois le cache manqué (fenêtre : COMMENCE_WINDOW par défaut).
+    """
+    url = f'{API_BASE_URL}/sports/{sport}/odds'
     params = {
-        'apiKey': API_KEY,
-        'regions': REGIONS,
+        'apiKey': key,
+        'regions': regions or REGIONS,
         'markets': MARKETS,
         'oddsFormat': 'decimal'
     }
+    params.update(window_params(window))
+    return url, params
+
+
+def fetch_sport_odds(sport, session, window=None):
+    regions = split_regions()
+    if regions:
+        payloads = [_fetch_sport_odds_once(sport, session, window, region) for region in regions]
+        return merge_region_events(payloads)
+    return _fetch_sport_odds_once(sport, session, window)
+
+
+def _fetch_sport_odds_once(sport, session, window=None, region=None):
+    data = cache_get(sport, window, region)
+    if data is not None:
+        for event in data:
+            event['_sport'] = sport
+        return data
+    key = request_key(sport)
+    if key is None:
+        return []
+    url, params = odds_request(sport, key, window, region)
+    t0 = time.perf_counter()
     try:
-        resp = session.get(url, params=params, timeout=10)
-        if resp.status_code != 200:
+        resp = session.get(url, params=params, timeout=REQUEST_TIMEOUT)
+        METRICS.record_fetch(sport, resp.status_code, len(resp.content), time.perf_counter() - t0)
+        if not record_response(sport, resp.status_code, resp.headers, params['apiKey'],
+                               track_cost=region is None, cost=request_cost(params)):
             return []
-        data = resp.json()
+        data = json_loads(resp.content)
+        cache_put(sport, data, window, region)
         for event in data:
             event['_sport'] = sport
         return data
     except requests.RequestException:
+        METRICS.record_fetch(sport, 'error', 0, time.perf_counter() - t0)
+        BREAKER.record_failure(sport)
+        return []
+    except ValueError:
+        BREAKER.record_failure(sport)
         return []
 
 
-def fetch_all_sports_odds():
+def make_session():
     session = requests.Session()
     adapter = requests.adapters.HTTPAdapter(
         pool_connections=MAX_WORKERS,
@@ -92,34 +960,148 @@ def fetch_all_sports_odds():
         max_retries=2
     )
     session.mount('https://', adapter)
+    session.mount('http://', adapter)      # Mock local (mock_odds_api.py)
+    return session
 
-    sports = fetch_sports(session)
-    if not sports:
-        print("   ✗ Aucun sport actif trouvé.")
+
+# ─────────────────────────────────────────────
+# MULTI-RÉGIONS
+# ─────────────────────────────────────────────
+def split_regions() -> list:
+    """Régions à interroger séparément ([] si un seul appel suffit)."""
+    regions = [r.strip() for r in REGIONS.split(',') if r.strip()]
+    return regions if SPLIT_REGIONS and len(regions) > 1 else []
+
+
+def needs_full_response() -> bool:
+    """Cache ou fusion multi-régions : il faut la réponse complète (pas de streaming)."""
+    return CACHE_ENABLED or bool(split_regions())
+
+
+def merge_region_events(payloads: list) -> list:
+    """
+    Fusionne les réponses /odds de plusieurs régions (ou fenêtres) par id d'événement.
+    Un bookmaker présent dans plusieurs réponses n'est gardé qu'une fois, dans
+    sa version la plus récente (last_update). Linéaire en taille totale : un dict
+    par événement indexe la position de chaque bookmaker.
+    """
+    merged: dict = {}                 # id -> événement fusionné
+    positions: dict = {}              # id -> {bookmaker: index dans event['bookmakers']}
+    anonymous = []                    # Événements sans id : impossibles à fusionner
+    for events in payloads:
+        for event in events:
+            eid = event.get('id')
+            if eid is None:
+                anonymous.append(event)
+                continue
+            base = merged.get(eid)
+            if base is None:
+                bookmakers = list(event.get('bookmakers', []))
+                base = dict(event, bookmakers=bookmakers)
+                merged[eid] = base
+                index = positions[eid] = {}
+                for i, bookie in enumerate(bookmakers):
+                    index.setdefault(bookie.get('key'), i)
+                continue
+            index = positions[eid]
+            bookmakers = base['bookmakers']
+            for bookie in event.get('bookmakers', []):
+                key = bookie.get('key')
+                i = index.get(key)
+                if i is None:
+                    index[key] = len(bookmakers)
+                    bookmakers.append(bookie)
+                elif bookie.get('last_update', '') > bookmakers[i].get('last_update', ''):
+                    bookmakers[i] = bookie
+    return list(merged.values()) + anonymous
+
+
+# ─────────────────────────────────────────────
+# FETCHING ASYNCHRONE (aiohttp)
+# ─────────────────────────────────────────────
+async def fetch_sports_async(session):
+    key = KEYS.acquire()
+    if key is None:
+        print("   ✗ Aucune clé API utilisable (quotas épuisés ou clés en pause).")
+        return []
+    t0 = time.perf_counter()
+    try:
+        async with session.get(
+            f'{API_BASE_URL}/sports',
+            params={'apiKey': key}
+        ) as resp:
+            record_quota(key, resp.status, resp.headers)
+            body = await resp.read()
+            METRICS.record_fetch('_sports', resp.status, len(body), time.perf_counter() - t0)
+            resp.raise_for_status()
+            data = json_loads(body)
+        return [s['key'] for s in data if s.get('active')]
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        METRICS.record_fetch('_sports', 'error', 0, time.perf_counter() - t0)
+        print(f"   ✗ Erreur récupération sports : {e}")
         return []
 
-    all_events = []
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        futures = {
-            executor.submit(fetch_sport_odds, sport, session): sport
-            for sport in sports
-        }
-        for future in as_completed(futures):
-            sport = futures[future]
-            try:
-                events = future.result()
-                all_events.extend(events)
-                if events:
-                    print(f"   ✓ {sport}: {len(events)} événements")
-            except Exception as e:
-                print(f"   ✗ {sport}: {e}")
 
-    return all_events
+async def fetch_sport_odds_async(sport, session, semaphore):
+    regions = split_regions()
+    if regions:
+        payloads = await asyncio.gather(*(
+            _fetch_sport_odds_once_async(sport, session, semaphore, region) for region in regions
+        ))
+        return merge_region_events(payloads)
+    return await _fetch_sport_odds_once_async(sport, session, semaphore)
+
+
+async def _fetch_sport_odds_once_async(sport, session, semaphore, region=None):
+    data = cache_get(sport, regions=region)
+    if data is not None:
+        for event in data:
+            event['_sport'] = sport
+        return data
+    async with semaphore:
+        key = request_key(sport)
+        if key is None:
+            return []
+        url, params = odds_request(sport, key, regions=region)
+        t0 = time.perf_counter()
+        try:
+            async with session.get(url, params=params) as resp:
+                if not record_response(sport, resp.status, resp.headers, params['apiKey'],
+                                       track_cost=region is None, cost=request_cost(params)):
+                    METRICS.record_fetch(sport, resp.status, 0, time.perf_counter() - t0)
+                    return []
+                body = await resp.read()
+                METRICS.record_fetch(sport, resp.status, len(body), time.perf_counter() - t0)
+            data = json_loads(body)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            METRICS.record_fetch(sport, 'error', 0, time.perf_counter() - t0)
+            BREAKER.record_failure(sport)
+            return []
+        except ValueError:
+            BREAKER.record_failure(sport)
+            return []
+    if CACHE_ENABLED:
+        await asyncio.to_thread(cache_put, sport, data, None, region)
+    for event in data:
+        event['_sport'] = sport
+    return data
+
+
+def make_async_session():
+    # Un seul pool de connexions keep-alive partagé par toutes les requêtes
+    connector = aiohttp.TCPConnector(
+        limit=ASYNC_CONCURRENCY,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=300
+    )
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
 
 
 # ─────────────────────────────────────────────
 # EXTRACTION DES COTES
 # ─────────────────────────────────────────────
+@instrumented('extract')
 def extract_all_odds(event: dict) -> dict:
     """
     Retourne : { market_key: { outcome_key: [Outcome, ...] } }
@@ -128,18 +1110,18 @@ def extract_all_odds(event: dict) -> dict:
     markets_data: dict = {}
 
     for bookie in event.get('bookmakers', []):
-        bookie_key = bookie.get('key', 'unknown')
+        bookie_key = sys.intern(bookie.get('key', 'unknown'))
 
         for market in bookie.get('markets', []):
-            mkey = market.get('key', 'unknown')
+            mkey = sys.intern(market.get('key', 'unknown'))
             if mkey not in markets_data:
                 markets_data[mkey] = {}
 
             for outcome in market.get('outcomes', []):
-                name  = outcome.get('name', '?')
+                name  = sys.intern(outcome.get('name', '?'))
                 price = outcome.get('price', 0.0)
                 point = outcome.get('point')
-                okey  = f"{name}|{point}" if point is not None else name
+                okey  = sys.intern(f"{name}|{point}") if point is not None else name
 
                 if okey not in markets_data[mkey]:
                     markets_data[mkey][okey] = []
@@ -154,108 +1136,2013 @@ def extract_all_odds(event: dict) -> dict:
 
 
 # ─────────────────────────────────────────────
-# FILTRE OUTLIERS (Z-SCORE)
+# DÉCODAGE JSON RAPIDE (msgspec / orjson)
 # ─────────────────────────────────────────────
-def filter_outlier_odds(odds_per_outcome: dict) -> dict:
-    filtered = {}
-    for name, outcomes in odds_per_outcome.items():
-        prices = [o.price for o in outcomes]
-        if len(prices) < 3:
-            filtered[name] = outcomes
-            continue
-        mean  = statistics.mean(prices)
-        stdev = statistics.stdev(prices)
-        if stdev == 0:
-            filtered[name] = outcomes
-            continue
-        valid = [o for o in outcomes if abs((o.price - mean) / stdev) <= OUTLIER_Z_SCORE]
-        filtered[name] = valid if valid else outcomes
-    return filtered
+def json_backend() -> str:
+    """Backend effectif selon JSON_BACKEND et les bibliothèques installées."""
+    if JSON_BACKEND in ('auto', 'msgspec') and msgspec is not None:
+        return 'msgspec'
+    if JSON_BACKEND in ('auto', 'msgspec', 'orjson') and orjson is not None:
+        return 'orjson'
+    return 'json'
 
 
-# ─────────────────────────────────────────────
-# CALCUL DE L'ARBITRAGE
-# ─────────────────────────────────────────────
-def best_outcome(outcomes: list) -> Outcome:
-    """Retourne le bookmaker avec la meilleure cote."""
-    return max(outcomes, key=lambda o: o.price)
+@instrumented('decode')
+def json_loads(body):
+    """Décode un corps JSON en objets Python (orjson si disponible)."""
+    if orjson is not None and json_backend() != 'json':
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+if msgspec is not None:
+    # Schémas typés : seuls les champs utilisés sont décodés, le reste est ignoré
+    class OutcomeSchema(msgspec.Struct):
+        name: str = '?'
+        price: float = 0.0
+        point: Optional[Union[int, float]] = None     # int gardé tel quel : clé "name|point" identique
+
+    class MarketSchema(msgspec.Struct):
+        key: str = 'unknown'
+        outcomes: list[OutcomeSchema] = []
 
+    class BookmakerSchema(msgspec.Struct):
+        key: str = 'unknown'
+        markets: list[MarketSchema] = []
 
-def compute_arbitrage(event: dict, mkey: str, outcomes_dict: dict) -> Optional[ArbitrageResult]:
+    class EventSchema(msgspec.Struct):
+        id: Optional[str] = None
+        home_team: Optional[str] = None
+        away_team: Optional[str] = None
+        commence_time: Optional[str] = None
+        bookmakers: list[BookmakerSchema] = []
+
+    _EVENTS_DECODER = msgspec.json.Decoder(list[EventSchema])
+
+
+@instrumented('extract')
+def extract_typed_odds(event) -> dict:
     """
-    Calcule l'opportunité d'arbitrage pour un marché donné.
-    Pour chaque outcome, on prend la meilleure cote disponible (tous bookmakers).
-    margin = somme des (1/cote) — si < 1.0, c'est un surebet.
+    Équivalent de extract_all_odds sur un EventSchema (accès par attributs).
+    Le test "un seul outcome par bookmaker" passe par un set au lieu d'un any()
+    linéaire sur la liste des cotes.
     """
-    outcome_keys = list(outcomes_dict.keys())
-    if len(outcome_keys) < 2:
-        return None
+    markets_data: dict = {}
+    seen: set = set()                 # (marché, outcome_key, bookmaker) déjà retenus
 
-    best_per_outcome = {okey: best_outcome(outcomes_dict[okey]) for okey in outcome_keys}
+    for bookie in event.bookmakers:
+        bookie_key = sys.intern(bookie.key)
 
-    # Marge (overround inversé)
-    margin = sum(1.0 / o.price for o in best_per_outcome.values())
+        for market in bookie.markets:
+            mkey = sys.intern(market.key)
+            outcomes_map = markets_data.setdefault(mkey, {})
 
-    profit_pct = (1.0 / margin - 1.0) * 100
+            for outcome in market.outcomes:
+                name  = sys.intern(outcome.name)
+                point = outcome.point
+                okey  = sys.intern(f"{name}|{point}") if point is not None else name
+                quotes = outcomes_map.setdefault(okey, [])
 
-    # Filtre : on ignore si hors plage
+                if outcome.price > 1.0 and (mkey, okey, bookie_key) not in seen:
+                    seen.add((mkey, okey, bookie_key))
+                    quotes.append(
+                        Outcome(name=name, price=outcome.price, bookie=bookie_key, point=point)
+                    )
+
+    return markets_data
+
+
+def decode_extracted(sport: str, body: bytes) -> list:
+    """
+    Corps /odds complet → [(meta, marchés extraits), ...].
+    Chemin typé msgspec si disponible, sinon json_loads + extract_all_odds.
+    """
+    if json_backend() != 'msgspec':
+        return [extract_event(sport, event) for event in json_loads(body)]
+    with METRICS.timer('decode'):
+        events = _EVENTS_DECODER.decode(body)
+    extracted = []
+    for event in events:
+        meta = {'_sport': sport}
+        for key in ('id', 'home_team', 'away_team', 'commence_time'):
+            value = getattr(event, key)
+            if value is not None:
+                meta[key] = value
+        extracted.append((meta, extract_typed_odds(event)))
+    return extracted
+
+
+# ─────────────────────────────────────────────
+# EXTRACTION COLONNAIRE (NUMPY)
+# ─────────────────────────────────────────────
+@dataclass
+class OddsColumns:
+    """
+    Toutes les cotes d'un lot d'événements en colonnes contiguës, une ligne par
+    (événement, marché, outcome, bookmaker) retenue par extract_all_odds.
+    Les chaînes sont encodées par dictionnaire : les colonnes market / outcome /
+    bookie contiennent des indices dans market_keys / outcome_keys / bookies.
+    Un "groupe" est un sous-marché (événement, marché, ligne) comme découpé par
+    split_lines : c'est l'unité de calcul de compute_arbitrage.
+    """
+    events: list                      # meta de chaque événement (id, équipes, date, _sport)
+    market_keys: list                 # id marché -> 'h2h', 'spreads', ...
+    outcome_keys: list                # id outcome -> clé 'name' ou 'name|point'
+    outcome_names: list               # id outcome -> nom de l'issue
+    outcome_points: list              # id outcome -> point d'origine (int, float ou None)
+    bookies: list                     # id bookmaker -> clé du bookmaker
+    group_event: 'np.ndarray'         # groupe -> indice de l'événement (int32)
+    group_market: 'np.ndarray'        # groupe -> id marché (int32)
+    group_line: 'np.ndarray'          # groupe -> ligne (float64), NaN pour h2h
+    event: 'np.ndarray'               # ligne -> indice de l'événement (int32)
+    group: 'np.ndarray'               # ligne -> groupe (int32)
+    market: 'np.ndarray'              # ligne -> id marché (int32)
+    outcome: 'np.ndarray'             # ligne -> id outcome (int32)
+    bookie: 'np.ndarray'              # ligne -> id bookmaker (int32)
+    price: 'np.ndarray'               # ligne -> cote décimale (float64)
+    point: 'np.ndarray'               # ligne -> ligne spreads/totals, NaN si absente (float64)
+
+    def __len__(self) -> int:
+        return len(self.price)
+
+    @property
+    def n_groups(self) -> int:
+        return len(self.group_event)
+
+    def nbytes(self) -> int:
+        """Taille des colonnes numériques (octets)."""
+        return sum(getattr(self, c).nbytes for c in (
+            'group_event', 'group_market', 'group_line', 'event', 'group', 'market', 'outcome', 'bookie', 'price', 'point'))
+
+    def group_line_value(self, g: int) -> Optional[float]:
+        line = float(self.group_line[g])
+        return None if line != line else line
+
+    def iter_markets(self):
+        """
+        Reconstitue (meta, mkey, ligne, {outcome_key: [Outcome, ...]}) groupe par
+        groupe, comme extract_all_odds + split_lines (chemin scalaire, contrôles).
+        """
+        order = np.argsort(self.group, kind='stable')
+        bounds = np.searchsorted(self.group[order], np.arange(self.n_groups + 1))
+        for g in range(self.n_groups):
+            yield (self.events[int(self.group_event[g])], self.market_keys[int(self.group_market[g])],
+                   self.group_line_value(g), self.outcomes_dict(order[bounds[g]:bounds[g + 1]]))
+
+    def outcomes_dict(self, rows) -> dict:
+        """{outcome_key: [Outcome, ...]} des lignes `rows` (dans l'ordre donné)."""
+        outcomes: dict = {}
+        for row in rows.tolist():
+            o = int(self.outcome[row])
+            outcomes.setdefault(self.outcome_keys[o], []).append(Outcome(
+                name=self.outcome_names[o], price=float(self.price[row]),
+                bookie=self.bookies[int(self.bookie[row])], point=self.outcome_points[o],
+            ))
+        return outcomes
+
+
+class ColumnBuilder:
+    """
+    Accumule les lignes de OddsColumns événement par événement dans des
+    array.array typés (pas d'objet Python par cote), puis les expose en
+    tableaux NumPy sans copie via build().
+    """
+
+    def __init__(self):
+        self.events: list = []
+        self._markets: dict = {}      # chaîne -> id (dictionnaires d'encodage)
+        self._outcomes: dict = {}
+        self._bookies: dict = {}
+        self._groups: dict = {}       # (événement, id marché, ligne) -> groupe
+        self.outcome_names: list = []
+        self.outcome_points: list = []
+        self._group_event = array.array('i')
+        self._group_market = array.array('i')
+        self._group_line = array.array('d')
+        self._cols = {c: array.array('i') for c in ('event', 'group', 'market', 'outcome', 'bookie')}
+        self._price = array.array('d')
+        self._point = array.array('d')
+
+    def _outcome_id(self, name: str, point) -> int:
+        okey = f"{name}|{point}" if point is not None else name
+        oid = self._outcomes.get(okey)
+        if oid is None:
+            oid = self._outcomes[okey] = len(self._outcomes)
+            self.outcome_names.append(sys.intern(name))
+            self.outcome_points.append(point)
+        return oid
+
+    def _append_rows(self, ev: int, quotes, home_team: Optional[str] = None):
+        """quotes : itérable de (bookmaker, marché, nom, cote, point), dans l'ordre de l'API."""
+        cols, markets, bookies, groups = self._cols, self._markets, self._bookies, self._groups
+        seen: set = set()
+        nan = float('nan')
+        for bookie_key, mkey, name, price, point in quotes:
+            if price <= 1.0:
+                continue
+            mid = markets.get(mkey)
+            if mid is None:
+                mkey = sys.intern(mkey)
+                mid = markets[mkey] = len(markets)
+            oid = self._outcome_id(name, point)
+            bid = bookies.get(bookie_key)
+            if bid is None:
+                bookie_key = sys.intern(bookie_key)
+                bid = bookies[bookie_key] = len(bookies)
+            if (mid, oid, bid) in seen:
+                continue
+            seen.add((mid, oid, bid))
+            line = outcome_line(LINE_MARKETS.get(mkey), name, point, home_team)
+            gid = groups.get((ev, mid, line))
+            if gid is None:
+                gid = groups[(ev, mid, line)] = len(groups)
+                self._group_event.append(ev)
+                self._group_market.append(mid)
+                self._group_line.append(nan if line is None else line)
+            cols['event'].append(ev)
+            cols['group'].append(gid)
+            cols['market'].append(mid)
+            cols['outcome'].append(oid)
+            cols['bookie'].append(bid)
+            self._price.append(price)
+            self._point.append(nan if point is None else point)
+
+    def add_event(self, event: dict):
+        """Événement brut (dict JSON, '_sport' renseigné)."""
+        ev = len(self.events)
+        self.events.append({k: event[k] for k in EVENT_META_KEYS if k in event})
+        self._append_rows(ev, (
+            (bookie.get('key', 'unknown'), market.get('key', 'unknown'),
+             outcome.get('name', '?'), outcome.get('price', 0.0), outcome.get('point'))
+            for bookie in event.get('bookmakers', [])
+            for market in bookie.get('markets', [])
+            for outcome in market.get('outcomes', [])
+        ), event.get('home_team'))
+
+    def add_typed(self, sport: str, event):
+        """Événement décodé par msgspec (EventSchema)."""
+        ev = len(self.events)
+        meta = {'_sport': sport}
+        for key in ('id', 'home_team', 'away_team', 'commence_time'):
+            value = getattr(event, key)
+            if value is not None:
+                meta[key] = value
+        self.events.append(meta)
+        self._append_rows(ev, (
+            (bookie.key, market.key, outcome.name, outcome.price, outcome.point)
+            for bookie in event.bookmakers
+            for market in bookie.markets
+            for outcome in market.outcomes
+        ), event.home_team)
+
+    def build(self) -> OddsColumns:
+        def col(arr, dtype):
+            return np.frombuffer(arr, dtype=dtype) if len(arr) else np.empty(0, dtype=dtype)
+        return OddsColumns(
+            events=self.events,
+            market_keys=list(self._markets),
+            outcome_keys=list(self._outcomes),
+            outcome_names=self.outcome_names,
+            outcome_points=self.outcome_points,
+            bookies=list(self._bookies),
+            group_event=col(self._group_event, np.int32),
+            group_market=col(self._group_market, np.int32),
+            group_line=col(self._group_line, np.float64),
+            price=col(self._price, np.float64),
+            point=col(self._point, np.float64),
+            **{name: col(arr, np.int32) for name, arr in self._cols.items()},
+        )
+
+
+@instrumented('extract_columns')
+def extract_columns(events: list) -> OddsColumns:
+    """
+    Équivalent colonnaire de extract_all_odds sur tout un lot d'événements bruts
+    (mêmes règles : cote > 1.0, un seul outcome par bookmaker et par clé).
+    """
+    if np is None:
+        raise RuntimeError("numpy est requis pour l'extraction colonnaire (pip install numpy)")
+    builder = ColumnBuilder()
+    for event in events:
+        builder.add_event(event)
+    return builder.build()
+
+
+def decode_columns(bodies) -> OddsColumns:
+    """
+    Corps /odds [(sport, octets), ...] → OddsColumns, via les schémas msgspec
+    si disponibles (aucun dict intermédiaire), sinon json_loads.
+    """
+    if np is None:
+        raise RuntimeError("numpy est requis pour l'extraction colonnaire (pip install numpy)")
+    builder = ColumnBuilder()
+    for sport, body in bodies:
+        if json_backend() == 'msgspec':
+            with METRICS.timer('decode'):
+                events = _EVENTS_DECODER.decode(body)
+            with METRICS.timer('extract_columns'):
+                for event in events:
+                    builder.add_typed(sport, event)
+        else:
+            events = json_loads(body)
+            with METRICS.timer('extract_columns'):
+                for event in events:
+                    event['_sport'] = sport
+                    builder.add_event(event)
+    return builder.build()
+
+
+# ─────────────────────────────────────────────
+# MARCHÉS À LIGNES (SPREADS / TOTALS)
+# ─────────────────────────────────────────────
+def outcome_line(kind: Optional[str], name: str, point, home_team: Optional[str]) -> Optional[float]:
+    """
+    Ligne du sous-marché d'un outcome. totals : le point (Over 2.5 / Under 2.5).
+    spreads : le point vu du domicile (Home -1.5 et Away +1.5 → -1.5).
+    None hors marché à lignes.
+    """
+    if kind is None or point is None:
+        return None
+    if kind == 'spreads' and name != home_team:
+        point = -point
+    return point + 0.0                # -0.0 → 0.0
+
+
+def split_lines(event: dict, mkey: str, outcomes_dict: dict) -> dict:
+    """
+    Découpe un marché spreads/totals en sous-marchés à deux issues, un par ligne :
+    { ligne: { outcome_key: [Outcome, ...] } }, les cotes de chaque bookmaker
+    indexées sous leur ligne. Les autres marchés sont renvoyés tels quels sous None.
+    """
+    kind = LINE_MARKETS.get(mkey)
+    if kind is None:
+        return {None: outcomes_dict}
+    home = event.get('home_team')
+    lines: dict = {}
+    for okey, quotes in outcomes_dict.items():
+        if quotes:
+            line = outcome_line(kind, quotes[0].name, quotes[0].point, home)
+            lines.setdefault(line, {})[okey] = quotes
+    return lines
+
+
+# ─────────────────────────────────────────────
+# FILTRE OUTLIERS (Z-SCORE / MAD)
+# ─────────────────────────────────────────────
+MAD_SCALE = 0.6745                # Quantile 75 % de la loi normale : MAD → écart-type
+
+
+@instrumented('filter_outliers')
+def filter_outlier_odds(odds_per_outcome: dict) -> dict:
+    filtered = {}
+    for name, outcomes in odds_per_outcome.items():
+        prices = [o.price for o in outcomes]
+        if len(prices) < 3:
+            filtered[name] = outcomes
+            continue
+        if OUTLIER_RULE == 'mad':
+            center = statistics.median(prices)
+            spread = statistics.median([abs(p - center) for p in prices])
+            if spread == 0:
+                filtered[name] = outcomes
+                continue
+            valid = [o for o in outcomes if MAD_SCALE * abs(o.price - center) / spread <= OUTLIER_MAD_THRESHOLD]
+        else:
+            mean  = statistics.mean(prices)
+            stdev = statistics.stdev(prices)
+            if stdev == 0:
+                filtered[name] = outcomes
+                continue
+            valid = [o for o in outcomes if abs((o.price - mean) / stdev) <= OUTLIER_Z_SCORE]
+        filtered[name] = valid if valid else outcomes
+    return filtered
+
+
+def _segment_medians(values, starts, counts):
+    """Médiane de chaque segment d'un tableau déjà trié par segment puis par valeur."""
+    return (values[starts + (counts - 1) // 2] + values[starts + counts // 2]) / 2
+
+
+@instrumented('filter_outliers')
+def outlier_mask(cols: OddsColumns, mask=None, rule: Optional[str] = None):
+    """
+    filter_outlier_odds sur toutes les cotes d'un OddsColumns en un passage :
+    booléen par ligne, True = cote gardée. Mêmes règles par couple (groupe,
+    outcome) : moins de 3 cotes ou dispersion nulle → tout gardé, aucune cote
+    valide → tout gardé. Les lignes hors de `mask` sont écartées et ignorées.
+    """
+    rule = rule or OUTLIER_RULE
+    keep = np.zeros(len(cols), dtype=bool)
+    rows = np.arange(len(cols)) if mask is None else np.flatnonzero(mask)
+    if not len(rows):
+        return keep
+    pair = cols.group[rows].astype(np.int64) * max(len(cols.outcome_keys), 1) + cols.outcome[rows]
+    price = cols.price[rows]
+    order = np.lexsort((price, pair))                  # Par couple, puis par cote croissante
+    pair_sorted, price_sorted = pair[order], price[order]
+    starts = np.flatnonzero(np.concatenate(([True], pair_sorted[1:] != pair_sorted[:-1])))
+    counts = np.diff(np.append(starts, len(order)))
+    segment = np.repeat(np.arange(len(starts)), counts)
+
+    if rule == 'mad':
+        center = _segment_medians(price_sorted, starts, counts)
+        deviation = np.abs(price_sorted - center[segment])
+        spread = _segment_medians(deviation[np.lexsort((deviation, segment))], starts, counts)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            valid = MAD_SCALE * deviation / spread[segment] <= OUTLIER_MAD_THRESHOLD
+    else:
+        # Deux passes (moyenne puis écarts) : pas d'annulation catastrophique sur sum(x²)
+        mean = np.add.reduceat(price_sorted, starts) / counts
+        deviation = price_sorted - mean[segment]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            spread = np.sqrt(np.add.reduceat(deviation * deviation, starts) / (counts - 1))
+            valid = np.abs(deviation / spread[segment]) <= OUTLIER_Z_SCORE
+        # Cotes toutes égales : écart-type exactement nul pour statistics.stdev
+        spread[np.maximum.reduceat(price_sorted, starts) == np.minimum.reduceat(price_sorted, starts)] = 0
+
+    keep_all = (counts < 3) | (spread == 0) | (np.add.reduceat(valid.astype(np.int64), starts) == 0)
+    keep[rows[order]] = valid | keep_all[segment]
+    return keep
+
+
+# ─────────────────────────────────────────────
+# PRIX JUSTES (CONSENSUS DÉ-MARGÉ INCRÉMENTAL)
+# ─────────────────────────────────────────────
+@dataclass(slots=True)
+class ConsensusBook:
+    prices: list                      # Cote par outcome du marché (None : non cotée)
+    missing: int                      # Outcomes non cotés ; 0 = book complet, pris dans le consensus
+    weight: float
+
+
+@dataclass(slots=True)
+class ConsensusMarket:
+    commence: Optional[datetime] = None
+    outcomes: dict = field(default_factory=dict)    # outcome_key -> index
+    books: dict = field(default_factory=dict)       # bookmaker -> ConsensusBook
+    sums: list = field(default_factory=list)        # Σ poids × probabilité dé-margée, par outcome
+    weight: float = 0.0                             # Σ poids des books complets
+    n_books: int = 0
+
+
+class ConsensusModel:
+    """
+    Probabilités justes par outcome : moyenne pondérée, sur les bookmakers qui
+    cotent toutes les issues d'un (sous-)marché, des probabilités dé-margées
+    (1/cote normalisé par l'overround du book). Les books SHARP_BOOKMAKERS
+    pèsent SHARP_WEIGHT.
+    Les sommes sont tenues à jour cote par cote : une cote modifiée retire puis
+    remet la contribution de son book (O(nb d'issues)), une cote inchangée ne
+    coûte qu'une comparaison. L'état persiste entre les polls.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.markets: dict = {}       # (event_id, marché, ligne) -> ConsensusMarket
+
+    @staticmethod
+    def _contribute(m: ConsensusMarket, book: ConsensusBook, sign: int):
+        inverse = [1.0 / price for price in book.prices]
+        w = sign * book.weight / sum(inverse)
+        for i, inv in enumerate(inverse):
+            m.sums[i] += w * inv
+        m.weight += sign * book.weight
+        m.n_books += sign
+        if not m.n_books:
+            # Plus aucun book : repart de zéro exact (pas de résidu d'arrondi)
+            m.sums = [0.0] * len(m.sums)
+            m.weight = 0.0
+
+    def _set(self, m: ConsensusMarket, bookie: str, i: int, price: Optional[float]):
+        book = m.books.get(bookie)
+        if book is None:
+            n = len(m.sums)
+            book = m.books[bookie] = ConsensusBook(
+                [None] * n, n, SHARP_WEIGHT if bookie in SHARP_BOOKMAKERS else 1.0)
+        old = book.prices[i]
+        if old == price:
+            return
+        if not book.missing:
+            self._contribute(m, book, -1)
+        book.missing -= (old is None) - (price is None)
+        book.prices[i] = price
+        if not book.missing:
+            self._contribute(m, book, +1)
+
+    def _outcome(self, m: ConsensusMarket, okey: str) -> int:
+        i = m.outcomes.get(okey)
+        if i is None:
+            # Nouvelle issue (rare) : plus aucun book n'est complet
+            for book in m.books.values():
+                if not book.missing:
+                    self._contribute(m, book, -1)
+                book.prices.append(None)
+                book.missing += 1
+            i = m.outcomes[okey] = len(m.sums)
+            m.sums.append(0.0)
+        return i
+
+    def observe(self, key: tuple, quotes, commence: Optional[datetime] = None):
+        """
+        Photo d'un (sous-)marché : quotes = itérable de (outcome_key, bookmaker, cote).
+        Les cotes absentes de la photo (book ou issue retirés) sortent du consensus.
+        """
+        with self._lock:
+            m = self.markets.get(key)
+            if m is None:
+                m = self.markets[key] = ConsensusMarket(commence)
+            seen = set()
+            for okey, bookie, price in quotes:
+                i = self._outcome(m, okey)
+                self._set(m, bookie, i, price)
+                seen.add((bookie, i))
+            for bookie, book in list(m.books.items()):
+                for i, price in enumerate(book.prices):
+                    if price is not None and (bookie, i) not in seen:
+                        self._set(m, bookie, i, None)
+                if book.missing == len(book.prices):
+                    del m.books[bookie]
+
+    def observe_outcomes(self, event: dict, mkey: str, line: Optional[float], outcomes_dict: dict):
+        """observe() depuis {outcome_key: [Outcome, ...]} (chemin scalaire)."""
+        if event.get('id') is None:
+            return
+        key = (event['id'], mkey, line)
+        commence = None if key in self.markets else parse_commence(event.get('commence_time', ''))
+        self.observe(key, ((okey, o.bookie, o.price) for okey, quotes in outcomes_dict.items() for o in quotes),
+                     commence)
+
+    def observe_columns(self, cols: OddsColumns, mask=None):
+        """observe() de chaque groupe d'un OddsColumns (lignes hors de mask ignorées)."""
+        rows = np.arange(len(cols)) if mask is None else np.flatnonzero(mask)
+        rows = rows[np.argsort(cols.group[rows], kind='stable')]
+        bounds = np.searchsorted(cols.group[rows], np.arange(cols.n_groups + 1)).tolist()
+        outcome = cols.outcome[rows].tolist()
+        bookie = cols.bookie[rows].tolist()
+        price = cols.price[rows].tolist()
+        okeys, bookies = cols.outcome_keys, cols.bookies
+        for g in range(cols.n_groups):
+            event = cols.events[int(cols.group_event[g])]
+            if event.get('id') is None:
+                continue
+            key = (event['id'], cols.market_keys[int(cols.group_market[g])], cols.group_line_value(g))
+            commence = None if key in self.markets else parse_commence(event.get('commence_time', ''))
+            self.observe(key, ((okeys[outcome[j]], bookies[bookie[j]], price[j])
+                               for j in range(bounds[g], bounds[g + 1])), commence)
+
+    def fair_probs(self, event_id: Optional[str], mkey: str, line: Optional[float] = None) -> Optional[dict]:
+        """{outcome_key: probabilité juste}, ou None si moins de CONSENSUS_MIN_BOOKS books complets."""
+        with self._lock:
+            m = self.markets.get((event_id, mkey, line))
+            if m is None or m.n_books < CONSENSUS_MIN_BOOKS:
+                return None
+            return {okey: m.sums[i] / m.weight for okey, i in m.outcomes.items()}
+
+    def prune(self, now: Optional[datetime] = None) -> int:
+        """Oublie les marchés des matchs commencés ; retourne leur nombre."""
+        now = now or datetime.now(timezone.utc)
+        with self._lock:
+            started = [k for k, m in self.markets.items() if m.commence is not None and m.commence <= now]
+            for k in started:
+                del self.markets[k]
+        return len(started)
+
+
+CONSENSUS = ConsensusModel()
+
+
+def kelly_fraction(price: float, p: float) -> float:
+    """Fraction de bankroll de Kelly fractionné pour une cote et une probabilité de gain."""
+    return KELLY_FRACTION * ((price - 1) * p - (1 - p)) / (price - 1)
+
+
+# ─────────────────────────────────────────────
+# KELLY SIMULTANÉ (ISSUES EXCLUSIVES, PORTEFEUILLE)
+# ─────────────────────────────────────────────
+# Sur les issues exclusives d'un marché, la mise de Kelly maximise
+#   Σ p_i·log(R + f_i·o_i) + (1 - P_S)·log(R) - λ·F     (R = 1 - F, F = Σ f_i)
+# λ ≥ 0 est le prix du budget de bankroll partagé entre marchés. Les issues
+# pariées S sont un préfixe des issues triées par espérance p·o décroissante
+# (Smoczynski & Tomkins) ; pour un préfixe de somme P = Σ p, u = 1 - Σ 1/o :
+#   u·D² - (u + λ)·D + λ·P = 0 (plus grande racine),  R = (1 - P/D) / u,
+#   f_i = p_i / D - R / o_i,  et l'issue suivante entre si p·o > D·R.
+# Sans budget (λ = 0) : D = 1, R = (1 - P) / (1 - Σ 1/o).
+def _kelly_prefix(p_sum: float, inv_sum: float, lam: float) -> tuple:
+    """(D, R) d'un préfixe d'issues pariées ; None si Σ 1/o ≥ 1 (préfixe impossible)."""
+    u = 1.0 - inv_sum
+    if u <= 0:
+        return None
+    d = ((u + lam) + math.sqrt(max((u + lam) ** 2 - 4 * u * lam * p_sum, 0.0))) / (2 * u)
+    return d, max((1.0 - p_sum / d) / u, 0.0)
+
+
+def kelly_allocation(prices: list, probs: list, lam: float = 0.0) -> list:
+    """Fractions de Kelly (pleines) simultanées sur les issues exclusives d'un marché, dans l'ordre donné."""
+    order = sorted(range(len(prices)), key=lambda i: -probs[i] * prices[i])
+    d, r = 1.0 + lam, 1.0                         # Aucune issue pariée
+    p_sum = inv_sum = 0.0
+    n_bet = 0
+    for i in order:
+        if probs[i] * prices[i] <= d * r:
+            break
+        prefix = _kelly_prefix(p_sum + probs[i], inv_sum + 1.0 / prices[i], lam)
+        if prefix is None:
+            break
+        d, r = prefix
+        p_sum += probs[i]
+        inv_sum += 1.0 / prices[i]
+        n_bet += 1
+    fractions = [0.0] * len(prices)
+    for i in order[:n_bet]:
+        fractions[i] = max(probs[i] / d - r / prices[i], 0.0)
+    return fractions
+
+
+def kelly_batch(price, prob, lam: float = 0.0):
+    """
+    kelly_allocation sur une matrice (marchés × issues) en une passe NumPy.
+    Issues absentes : prob = 0. Retourne (fractions, fraction totale par marché).
+    """
+    n_markets, width = price.shape
+    order = np.argsort(-(prob * price), axis=1, kind='stable')
+    p = np.take_along_axis(prob, order, axis=1)
+    inv = np.where(p > 0, 1.0 / np.take_along_axis(price, order, axis=1), 0.0)
+    p_sum, inv_sum = np.cumsum(p, axis=1), np.cumsum(inv, axis=1)
+    u = 1.0 - inv_sum
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d = ((u + lam) + np.sqrt(np.maximum((u + lam) ** 2 - 4 * u * lam * p_sum, 0.0))) / (2 * u)
+        r = np.maximum((1.0 - p_sum / d) / u, 0.0)
+    # Colonne k : préfixe de k issues (k = 0 : aucune issue pariée)
+    d = np.hstack((np.full((n_markets, 1), 1.0 + lam), d))
+    r = np.hstack((np.ones((n_markets, 1)), r))
+    enters = (p * np.take_along_axis(price, order, axis=1) > d[:, :-1] * r[:, :-1]) & (u > 0)
+    n_bet = np.argmin(np.hstack((enters, np.zeros((n_markets, 1), dtype=bool))), axis=1)
+    d_bet = d[np.arange(n_markets), n_bet][:, None]
+    r_bet = r[np.arange(n_markets), n_bet][:, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        f = np.where(np.arange(width) < n_bet[:, None], np.maximum(p / d_bet - r_bet * inv, 0.0), 0.0)
+    fractions = np.empty_like(f)
+    np.put_along_axis(fractions, order, f, axis=1)
+    return fractions, fractions.sum(axis=1)
+
+
+def outcome_key(bet: Bet) -> str:
+    """Clé d'outcome d'un pari, comme à l'extraction ('nom' ou 'nom|point')."""
+    return f"{bet.outcome}|{bet.point}" if bet.point is not None else bet.outcome
+
+
+class KellyPortfolio:
+    """
+    Mises de Kelly simultanées sur tous les marchés ouverts, sous le budget
+    MAX_EXPOSURE : le multiplicateur λ du budget est cherché par fausse position
+    (Illinois) autour de celui du poll précédent, chaque essai résolvant tous
+    les marchés d'un coup avec kelly_batch.
+    """
+
+    def __init__(self):
+        self.lam = 0.0
+        self.iterations = 0           # Évaluations de kelly_batch au dernier solve
+        self.open: dict = {}          # (event_id, marché, ligne) -> [ArbitrageResult, ...]
+
+    def update(self, results: list, event_ids=None, markets=None):
+        """
+        Remplace les opportunités ouvertes de ce qui a été re-pollé : un marché
+        couvert absent de results est refermé, le reste (autre fenêtre, autre
+        sport, marché non demandé) reste ouvert. markets : couples (event_id,
+        marché) couverts (poll par événement) ; sinon event_ids, tous marchés
+        confondus (ceux de results si None).
+        """
+        fresh = self._groups(results)
+        if markets is not None:
+            markets = set(markets)
+            covered = {k for k in self.open if k[:2] in markets}
+        else:
+            event_ids = {k[0] for k in fresh} if event_ids is None else set(event_ids)
+            covered = {k for k in self.open if k[0] in event_ids}
+        self.open = {k: rs for k, rs in self.open.items() if k not in covered and k not in fresh}
+        self.open.update(fresh)
+
+    @staticmethod
+    def _groups(results: list) -> dict:
+        groups: dict = {}
+        for r in results:
+            if r.middle_pct is None and r.event_id is not None:
+                groups.setdefault((r.event_id, r.market, r.line), []).append(r)
+        return groups
+
+    def _total(self, price, prob, lam: float) -> float:
+        self.iterations += 1
+        return float(kelly_batch(price, prob, lam)[1].sum())
+
+    def _solve_lambda(self, price, prob, budget: float) -> float:
+        self.iterations = 0
+        zero_excess = self._total(price, prob, 0.0) - budget
+        if zero_excess <= 0:
+            return 0.0
+        # Encadrement serré autour du λ précédent (démarrage à chaud), élargi géométriquement
+        lam, step = (self.lam, 1.1) if self.lam else (1e-3, 4.0)
+        excess = self._total(price, prob, lam) - budget
+        if excess > 0:
+            lo, lo_excess = lam, excess
+            hi, hi_excess = lam, excess
+            for _ in range(60):
+                hi *= step
+                step *= 2
+                hi_excess = self._total(price, prob, hi) - budget
+                if hi_excess <= 0:
+                    break
+                lo, lo_excess = hi, hi_excess
+            else:
+                return hi
+        else:
+            hi, hi_excess = lam, excess
+            lo, lo_excess = lam / step, None
+            while lo > 1e-9:
+                lo_excess = self._total(price, prob, lo) - budget
+                if lo_excess > 0:
+                    break
+                hi, hi_excess = lo, lo_excess
+                step *= 2
+                lo /= step
+            else:
+                lo, lo_excess = 0.0, zero_excess
+        # Fausse position (Illinois) : quelques évaluations suffisent d'un poll à l'autre
+        side = 0
+        for _ in range(60):
+            lam = hi - hi_excess * (hi - lo) / (hi_excess - lo_excess)
+            excess = self._total(price, prob, lam) - budget
+            if abs(excess) <= 1e-6 * budget or hi - lo <= 1e-9 * hi:
+                break
+            if excess > 0:
+                lo, lo_excess = lam, excess
+                if side == 1:
+                    hi_excess /= 2
+                side = 1
+            else:
+                hi, hi_excess = lam, excess
+                if side == -1:
+                    lo_excess /= 2
+                side = -1
+        return hi if excess > 0 else lam
+
+    def solve(self, results: Optional[list] = None, budget: Optional[float] = None) -> int:
+        """
+        Répartit la bankroll sur les marchés ouverts (ou sur results) et réécrit
+        leurs kelly_stakes. Retourne le nombre de marchés alloués.
+        """
+        groups = self.open if results is None else self._groups(results)
+        markets = []                  # (résultats, {outcome_key: (cote, proba)})
+        for key, rs in list(groups.items()):
+            fair = CONSENSUS.fair_probs(*key)
+            if fair is None:
+                if results is None:
+                    del self.open[key]    # Match commencé (consensus purgé) ou trop peu de books
+                continue
+            legs = {}
+            for r in rs:
+                for bet in r.bets:
+                    okey = outcome_key(bet)
+                    if okey in fair and bet.cote > legs.get(okey, (0.0,))[0]:
+                        legs[okey] = (bet.cote, fair[okey])
+            if legs:
+                markets.append((rs, legs))
+        if not markets:
+            return 0
+
+        budget = (MAX_EXPOSURE if budget is None else budget) / KELLY_FRACTION
+        if np is not None:
+            width = max(len(legs) for _, legs in markets)
+            price = np.ones((len(markets), width))
+            prob = np.zeros((len(markets), width))
+            for m, (_, legs) in enumerate(markets):
+                for j, (cote, p) in enumerate(legs.values()):
+                    price[m, j], prob[m, j] = cote, p
+            self.lam = self._solve_lambda(price, prob, budget)
+            fractions = kelly_batch(price, prob, self.lam)[0].tolist()
+        else:
+            # Sans NumPy : Kelly par marché, réduit proportionnellement au budget
+            fractions = [kelly_allocation([c for c, _ in legs.values()], [p for _, p in legs.values()])
+                         for _, legs in markets]
+            total = sum(map(sum, fractions))
+            scale = min(1.0, budget / total) if total > 0 else 1.0
+            fractions = [[f * scale for f in row] for row in fractions]
+
+        for (rs, legs), row in zip(markets, fractions):
+            stakes = dict(zip(legs, row))
+            for r in rs:
+                r.kelly_stakes = {
+                    bet.outcome: KELLY_FRACTION * stakes.get(outcome_key(bet), 0.0) * TOTAL_INVESTMENT
+                    for bet in r.bets
+                }
+        return len(markets)
+
+
+PORTFOLIO = KellyPortfolio()
+
+
+# ─────────────────────────────────────────────
+# CALCUL DE L'ARBITRAGE
+# ─────────────────────────────────────────────
+def parse_commence(commence_raw: str) -> Optional[datetime]:
+    """Parse un commence_time ISO 8601 ('...Z') ; None si invalide."""
+    try:
+        return datetime.fromisoformat(commence_raw.replace('Z', '+00:00'))
+    except Exception:
+        return None
+
+
+def best_outcome(outcomes: list) -> Outcome:
+    """Retourne le bookmaker avec la meilleure cote."""
+    return max(outcomes, key=lambda o: o.price)
+
+
+@instrumented('compute_arbitrage')
+def compute_arbitrage(event: dict, mkey: str, outcomes_dict: dict,
+                      line: Optional[float] = None) -> Optional[ArbitrageResult]:
+    """
+    Calcule l'opportunité d'arbitrage pour un marché (ou sous-marché d'une ligne) donné.
+    Pour chaque outcome, on prend la meilleure cote disponible (tous bookmakers),
+    ou la meilleure combinaison jouable si des CONSTRAINTS sont actives.
+    margin = somme des (1/cote) — si < 1.0, c'est un surebet.
+    """
+    outcome_keys = list(outcomes_dict.keys())
+    if len(outcome_keys) < 2:
+        return None
+
+    if CONSTRAINTS.active():
+        combos = best_combinations(outcomes_dict)
+        if not combos:
+            return None
+        best_per_outcome = dict(zip(outcome_keys, combos[0][1]))
+    else:
+        best_per_outcome = {okey: best_outcome(outcomes_dict[okey]) for okey in outcome_keys}
+
+    # Marge (overround inversé)
+    margin = sum(1.0 / o.price for o in best_per_outcome.values())
+
+    profit_pct = (1.0 / margin - 1.0) * 100
+
+    # Filtre : on ignore si hors plage
     if profit_pct < MIN_PROFIT_PCT or profit_pct > MAX_PROFIT_PCT:
         return None
 
     # Calcul des mises optimales
+    fair = CONSENSUS.fair_probs(event.get('id'), mkey, line) if CONSENSUS_ENABLED else None
+    if fair is not None:
+        # Kelly simultané sur les issues exclusives, probabilités justes du consensus
+        kelly = [KELLY_FRACTION * f for f in kelly_allocation(
+            [o.price for o in best_per_outcome.values()], [fair[okey] for okey in best_per_outcome])]
+    else:
+        # À défaut, probabilité implicite de chaque cote (Kelly nul)
+        kelly = [kelly_fraction(o.price, 1.0 / o.price) for o in best_per_outcome.values()]
+    legs = []
+    for outcome, k in zip(best_per_outcome.values(), kelly):
+        stake = (TOTAL_INVESTMENT / margin) / outcome.price
+        legs.append((outcome, stake, k))
+
+    return build_result(event, mkey, legs, margin, profit_pct, line)
+
+
+def build_result(event: dict, mkey: str, legs: list, margin: float, profit_pct: float,
+                 line: Optional[float] = None) -> ArbitrageResult:
+    """
+    Construit le résultat d'un marché retenu.
+    legs : [(Outcome, mise brute, fraction de Kelly brute), ...] dans l'ordre des outcomes.
+    Partagé par compute_arbitrage et le noyau vectorisé. Date et mises restent
+    brutes : seuls les résultats affichés sont formatés (format_commence, _print_result).
+    """
     bets = []
     kelly_stakes = {}
-    for okey, outcome in best_per_outcome.items():
-        stake = (TOTAL_INVESTMENT / margin) / outcome.price
-        bets.append({
-            'outcome': outcome.name,
-            'point':   outcome.point,
-            'bookie':  outcome.bookie,
-            'cote':    outcome.price,
-            'mise':    round(stake, 2),
-            'gain':    round(stake * outcome.price, 2)
-        })
-        # Kelly fractionné
-        p_implied = 1.0 / outcome.price
-        kelly = KELLY_FRACTION * ((outcome.price - 1) * p_implied - (1 - p_implied)) / (outcome.price - 1)
-        kelly_stakes[outcome.name] = round(max(kelly, 0) * TOTAL_INVESTMENT, 2)
+    for outcome, stake, kelly in legs:
+        bets.append(Bet(outcome.name, outcome.point, outcome.bookie, outcome.price, stake, stake * outcome.price))
+        kelly_stakes[outcome.name] = max(kelly, 0.0) * TOTAL_INVESTMENT
 
     profit_eur = round((1.0 / margin - 1.0) * TOTAL_INVESTMENT, 2)
 
-    # Format date
-    commence_raw = event.get('commence_time', '')
-    try:
-        commence = datetime.fromisoformat(commence_raw.replace('Z', '+00:00')).strftime('%d/%m/%Y %H:%M')
-    except Exception:
-        commence = commence_raw
-
     return ArbitrageResult(
-        sport      = event.get('_sport', '?'),
-        match      = f"{event.get('home_team', '?')} vs {event.get('away_team', '?')}",
-        commence   = commence,
+        sport      = sys.intern(event.get('_sport', '?')),
+        match      = sys.intern(f"{event.get('home_team', '?')} vs {event.get('away_team', '?')}"),
+        commence   = sys.intern(event.get('commence_time', '')),
         market     = mkey,
         profit_pct = round(profit_pct, 3),
         profit_eur = profit_eur,
         margin     = round(margin, 4),
-        bets       = bets,
+        bets       = tuple(bets),
         is_surebet = margin < 1.0,
-        kelly_stakes = kelly_stakes
+        kelly_stakes = kelly_stakes,
+        event_id   = event.get('id'),
+        line       = line
+    )
+
+
+def analyse_extracted(event: dict, markets: dict) -> list:
+    """Filtre outliers → arbitrage (et middles si SEARCH_MIDDLES) sur les cotes extraites d'un événement."""
+    results = []
+    for mkey, outcomes_dict in markets.items():
+        # Le filtre travaille par outcome_key : filtrer avant ou après split_lines est équivalent
+        filtered = filter_outlier_odds(outcomes_dict)
+        for line, sub_market in split_lines(event, mkey, filtered).items():
+            if CONSENSUS_ENABLED:
+                CONSENSUS.observe_outcomes(event, mkey, line, sub_market)
+            arb = compute_arbitrage(event, mkey, sub_market, line)
+            if arb is not None:
+                results.append(arb)
+            if SEARCH_VALUE:
+                results.extend(find_value_bets(event, mkey, sub_market, line))
+        if SEARCH_MIDDLES and mkey in LINE_MARKETS:
+            results.extend(find_cross_lines(event, mkey, filtered))
+    if METRICS_ENABLED:
+        METRICS.inc('events')
+        METRICS.inc('markets', len(markets))
+        METRICS.inc('results', len(results))
+        METRICS.inc('surebets', sum(r.is_surebet for r in results))
+    return results
+
+
+def find_value_bets(event: dict, mkey: str, outcomes_dict: dict,
+                    line: Optional[float] = None) -> list:
+    """
+    Value bets d'un (sous-)marché : meilleure cote jouable de chaque issue dont
+    l'espérance p_juste × cote - 1 dépasse MIN_VALUE_EDGE_PCT. Mise = Kelly fractionné.
+    """
+    fair = CONSENSUS.fair_probs(event.get('id'), mkey, line)
+    if fair is None:
+        return []
+    results = []
+    for okey, quotes in outcomes_dict.items():
+        quotes = [o for o in quotes if CONSTRAINTS.usable(o.bookie)]
+        if not quotes or okey not in fair:
+            continue
+        best, p = best_outcome(quotes), fair[okey]
+        edge_pct = (p * best.price - 1.0) * 100
+        if edge_pct < MIN_VALUE_EDGE_PCT or edge_pct > MAX_PROFIT_PCT:
+            continue
+        stake = kelly_fraction(best.price, p) * TOTAL_INVESTMENT
+        r = build_result(event, mkey, [(best, stake, kelly_fraction(best.price, p))],
+                         1.0 / (p * best.price), edge_pct, line)
+        r.profit_eur = round(stake * edge_pct / 100, 2)
+        r.is_surebet = False
+        r.fair_price = 1.0 / p
+        results.append(r)
+    return results
+
+
+def analyse_events(events: list) -> list:
+    """Pipeline complet extraction → filtre outliers → arbitrage sur une liste d'événements."""
+    results = []
+    for event in events:
+        results.extend(analyse_extracted(event, extract_all_odds(event)))
+    return results
+
+
+# ─────────────────────────────────────────────
+# MEILLEURES COMBINAISONS SOUS CONTRAINTES (BRANCH-AND-BOUND)
+# ─────────────────────────────────────────────
+def top_k_quotes(outcomes: list, k: int = TOPK_QUOTES, constraints: BookmakerConstraints = None) -> list:
+    """Les k meilleures cotes jouables d'un outcome, par cote décroissante (ordre d'origine à égalité)."""
+    constraints = constraints or CONSTRAINTS
+    usable = [o for o in outcomes if constraints.usable(o.bookie)]
+    return heapq.nlargest(k, usable, key=lambda o: o.price)
+
+
+def best_combinations(outcomes_dict: dict, constraints: BookmakerConstraints = None,
+                      n: int = 1, k: int = TOPK_QUOTES) -> list:
+    """
+    Les n meilleures combinaisons (une cote par outcome) respectant les contraintes,
+    par marge croissante : [(marge, [Outcome, ...] dans l'ordre des outcomes), ...].
+
+    Branch-and-bound en profondeur sur les top-k cotes de chaque outcome, les
+    outcomes les moins fournis d'abord. Borne : marge partielle + somme des
+    meilleures cotes restantes (contraintes relâchées) ; comme les cotes d'un
+    outcome sont triées, la première branche qui dépasse la n-ième meilleure
+    marge connue (ou la marge de MIN_PROFIT_PCT) coupe toutes les suivantes.
+    k est porté au nombre d'outcomes : avec un plafond de jambes par bookmaker,
+    la combinaison optimale ne peut pas utiliser une cote de rang plus élevé.
+    """
+    constraints = constraints or CONSTRAINTS
+    keys = list(outcomes_dict)
+    k = max(k, len(keys))
+    candidates = [top_k_quotes(outcomes_dict[okey], k, constraints) for okey in keys]
+    if len(keys) < 2 or not all(candidates):
+        return []
+
+    order = sorted(range(len(keys)), key=lambda i: len(candidates[i]))
+    levels = [[(1.0 / o.price, o) for o in candidates[i]] for i in order]
+    remaining = [0.0] * (len(levels) + 1)         # Borne inférieure des niveaux restants
+    for depth in range(len(levels) - 1, -1, -1):
+        remaining[depth] = remaining[depth + 1] + levels[depth][0][0]
+
+    cap = constraints.max_legs_per_bookie
+    # Marge au-delà de laquelle rien n'est affiché
+    limit = 1.0 / (1.0 + MIN_PROFIT_PCT / 100) if MIN_PROFIT_PCT > -100 else float('inf')
+    best: list = []                               # Tas max (marge négée) des n meilleures
+    tie = count()
+    chosen: list = [None] * len(levels)
+    legs_per_bookie: dict = {}
+
+    def bound() -> float:
+        return -best[0][0] if len(best) >= n else limit
+
+    def search(depth: int, partial: float):
+        if depth == len(levels):
+            combo = [None] * len(keys)
+            for i, o in zip(order, chosen):
+                combo[i] = o
+            margin = sum(1.0 / o.price for o in combo)   # Même ordre de sommation que compute_arbitrage
+            entry = (-margin, next(tie), combo)
+            if len(best) < n:
+                heapq.heappush(best, entry)
+            elif margin < -best[0][0]:
+                heapq.heapreplace(best, entry)
+            return
+        for inverse, o in levels[depth]:
+            if partial + inverse + remaining[depth + 1] > bound():
+                break
+            used = legs_per_bookie.get(o.bookie, 0)
+            if cap is not None and used >= cap:
+                continue
+            legs_per_bookie[o.bookie] = used + 1
+            chosen[depth] = o
+            search(depth + 1, partial + inverse)
+            legs_per_bookie[o.bookie] = used
+
+    search(0, 0.0)
+    return [(-neg, combo) for neg, _, combo in sorted(best, reverse=True)]
+
+
+# ─────────────────────────────────────────────
+# MIDDLES ET SUREBETS INTER-LIGNES
+# ─────────────────────────────────────────────
+def line_threshold(kind: str, outcome: Outcome, home_team: Optional[str]) -> tuple:
+    """
+    Ramène un outcome à lignes à un pari "au-dessus" / "en dessous" d'un seuil
+    sur une seule variable entière X : le total (totals) ou l'écart domicile -
+    extérieur (spreads). Over t gagne si X > t, Under t si X < t, égalité = remboursé.
+    Spreads : Home +p ↔ X > -p, Away +p ↔ X < p.
+    Retourne (côté, seuil) ou (None, None) (ligne asiatique en quart, outcome inconnu).
+    """
+    point = outcome.point
+    if point is None or (2 * point) % 1:
+        return None, None
+    if kind == 'totals':
+        side = {'over': 'over', 'under': 'under'}.get(outcome.name.lower())
+        return (side, point + 0.0) if side else (None, None)
+    if outcome.name == home_team:
+        return 'over', -point + 0.0
+    return 'under', point + 0.0
+
+
+def middle_payout(t_over: float, t_under: float, stake_over: float, price_over: float,
+                  stake_under: float, price_under: float) -> float:
+    """Meilleur retour total sur les scores entiers X de [t_over, t_under] (remboursements inclus)."""
+    best = 0.0
+    for x in range(math.floor(t_over), math.ceil(t_under) + 1):
+        ret = 0.0
+        if x > t_over:
+            ret += stake_over * price_over
+        elif x == t_over:
+            ret += stake_over
+        if x < t_under:
+            ret += stake_under * price_under
+        elif x == t_under:
+            ret += stake_under
+        best = max(best, ret)
+    return best
+
+
+@instrumented('cross_lines')
+def find_cross_lines(event: dict, mkey: str, outcomes_dict: dict) -> list:
+    """
+    Surebets inter-lignes et middles d'un marché spreads/totals : Over à t_o chez
+    un bookmaker + Under à t_u > t_o chez un autre. Au moins une jambe gagne
+    toujours ; si le score tombe entre les deux lignes, les deux gagnent.
+
+    Balayage des seuils triés avec la meilleure cote Over vue jusque-là (seuils
+    strictement inférieurs) : pour chaque ligne Under, le meilleur partenaire
+    est trouvé en O(1), soit O(L log L) pour L lignes au lieu du produit
+    lignes × bookmakers. Mises à retour égal ; profit_pct = profit garanti,
+    middle_pct = profit si le middle tombe.
+    """
+    kind = LINE_MARKETS.get(mkey)
+    if kind is None:
+        return []
+    home = event.get('home_team')
+    overs: dict = {}                  # seuil -> meilleure cote Over (tous bookmakers)
+    unders: dict = {}
+    for quotes in outcomes_dict.values():
+        quotes = [o for o in quotes if CONSTRAINTS.usable(o.bookie)]
+        if not quotes:
+            continue
+        best = best_outcome(quotes)
+        side, threshold = line_threshold(kind, best, home)
+        if side is None:
+            continue
+        book = overs if side == 'over' else unders
+        current = book.get(threshold)
+        if current is None or best.price > current.price:
+            book[threshold] = best
+
+    results = []
+    best_over, t_over = None, None
+    for threshold in sorted(overs.keys() | unders.keys()):
+        under = unders.get(threshold)
+        if under is not None and best_over is not None and not (
+                CONSTRAINTS.max_legs_per_bookie == 1 and under.bookie == best_over.bookie):
+            margin = 1.0 / best_over.price + 1.0 / under.price
+            profit_pct = (1.0 / margin - 1.0) * 100
+            if -MIDDLE_MAX_LOSS_PCT <= profit_pct <= MAX_PROFIT_PCT:
+                stakes = [(TOTAL_INVESTMENT / margin) / o.price for o in (best_over, under)]
+                legs = [(o, stake, 0.0) for o, stake in zip((best_over, under), stakes)]
+                result = build_result(event, mkey, legs, margin, profit_pct)
+                payout = middle_payout(t_over, threshold, stakes[0], best_over.price, stakes[1], under.price)
+                result.middle_pct = round((payout / TOTAL_INVESTMENT - 1.0) * 100, 3)
+                results.append(result)
+        over = overs.get(threshold)
+        # À cote égale on garde la ligne la plus basse : fenêtre de middle plus large
+        if over is not None and (best_over is None or over.price > best_over.price):
+            best_over, t_over = over, threshold
+    return results
+
+
+# ─────────────────────────────────────────────
+# ARBITRAGE VECTORISÉ (NUMPY)
+# ─────────────────────────────────────────────
+@dataclass
+class BatchArbitrage:
+    """
+    Sortie de arbitrage_kernel. Tableaux par groupe (événement, marché) et par
+    jambe ; les jambes du groupe g occupent leg_start[g]:leg_start[g + 1], dans
+    l'ordre des outcomes de extract_all_odds.
+    """
+    margin: 'np.ndarray'              # groupe -> somme des 1/meilleure cote
+    profit_pct: 'np.ndarray'          # groupe -> (1/margin - 1) × 100
+    n_legs: 'np.ndarray'              # groupe -> nombre d'outcomes cotés
+    valid: 'np.ndarray'               # groupe -> résultat retenu (≥ 2 outcomes, profit dans la plage)
+    leg_start: 'np.ndarray'           # groupe -> première jambe (taille n_groups + 1)
+    leg_row: 'np.ndarray'             # jambe -> ligne de OddsColumns de la meilleure cote
+    leg_bookie: 'np.ndarray'          # jambe -> id du meilleur bookmaker
+    leg_price: 'np.ndarray'           # jambe -> meilleure cote
+    leg_stake: 'np.ndarray'           # jambe -> mise (TOTAL_INVESTMENT / margin / cote)
+    leg_kelly: 'np.ndarray'           # jambe -> fraction de Kelly (avant plancher à 0)
+
+
+@instrumented('arbitrage_kernel')
+def arbitrage_kernel(cols: OddsColumns, mask=None) -> BatchArbitrage:
+    """
+    compute_arbitrage sur tous les marchés d'un lot en quelques tri / réductions
+    NumPy. mask (booléen par ligne) écarte des cotes, ex : outliers.
+    Mêmes opérations flottantes, dans le même ordre, que le chemin scalaire :
+    meilleure cote = première ligne de cote maximale (comme max()), marge sommée
+    séquentiellement dans l'ordre des outcomes (comme sum()).
+    """
+    n_groups = cols.n_groups
+    rows = np.arange(len(cols)) if mask is None else np.flatnonzero(mask)
+    group = cols.group[rows]
+    price = cols.price[rows]
+
+    # Couples (groupe, outcome) : tri stable, les lignes d'un couple gardent l'ordre de l'API
+    pair = group.astype(np.int64) * max(len(cols.outcome_keys), 1) + cols.outcome[rows]
+    order = np.argsort(pair, kind='stable')
+    pair_sorted = pair[order]
+    starts = np.flatnonzero(np.concatenate(([True], pair_sorted[1:] != pair_sorted[:-1]))) \
+        if len(order) else np.empty(0, dtype=np.intp)
+    first_seen = order[starts]
+    if len(starts):
+        # Première ligne de cote maximale de chaque couple (comme max())
+        price_sorted = price[order]
+        best_price = np.maximum.reduceat(price_sorted, starts)
+        segment = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, len(order))))
+        position = np.where(price_sorted == best_price[segment], np.arange(len(order)), len(order))
+        best = order[np.minimum.reduceat(position, starts)]
+    else:
+        best = starts
+
+    # Jambes regroupées par groupe, outcomes dans leur ordre d'apparition
+    best = best[np.lexsort((first_seen, group[best]))]
+    leg_group = group[best]
+    leg_price = price[best]
+    n_legs = np.bincount(leg_group, minlength=n_groups)
+    leg_start = np.zeros(n_groups + 1, dtype=np.int64)
+    np.cumsum(n_legs, out=leg_start[1:])
+    rank = np.arange(len(best)) - leg_start[leg_group]
+
+    inverse = np.zeros((n_groups, int(n_legs.max()) if n_groups else 0))
+    inverse[leg_group, rank] = 1.0 / leg_price
+    margin = np.zeros(n_groups)
+    for j in range(inverse.shape[1]):
+        margin += inverse[:, j]
+
+    with np.errstate(divide='ignore'):
+        profit_pct = (1.0 / margin - 1.0) * 100
+    valid = (n_legs >= 2) & (profit_pct >= MIN_PROFIT_PCT) & (profit_pct <= MAX_PROFIT_PCT)
+
+    with np.errstate(divide='ignore'):
+        leg_stake = (TOTAL_INVESTMENT / margin[leg_group]) / leg_price
+    p_implied = 1.0 / leg_price
+    leg_kelly = KELLY_FRACTION * ((leg_price - 1) * p_implied - (1 - p_implied)) / (leg_price - 1)
+
+    leg_row = rows[best]
+    return BatchArbitrage(
+        margin=margin, profit_pct=profit_pct, n_legs=n_legs, valid=valid,
+        leg_start=leg_start, leg_row=leg_row, leg_bookie=cols.bookie[leg_row],
+        leg_price=leg_price, leg_stake=leg_stake, leg_kelly=leg_kelly,
     )
 
 
+def batch_results(cols: OddsColumns, batch: BatchArbitrage, mask=None) -> list:
+    """
+    ArbitrageResult des groupes retenus, identiques à ceux de compute_arbitrage.
+    Un groupe dont les meilleures cotes dépassent CONSTRAINTS.max_legs_per_bookie
+    est recalculé par le chemin scalaire (best_combinations) ; les autres contraintes
+    sont déjà appliquées par le masque de analyse_columns.
+    """
+    results = []
+    valid = np.flatnonzero(batch.valid)
+    if not len(valid):
+        return results
+    leg_start = batch.leg_start.tolist()
+    leg_outcome = cols.outcome[batch.leg_row].tolist()
+    leg_bookie = batch.leg_bookie.tolist()
+    leg_price = batch.leg_price.tolist()
+    leg_stake = batch.leg_stake.tolist()
+    leg_kelly = batch.leg_kelly.tolist()
+    margin = batch.margin.tolist()
+    profit_pct = batch.profit_pct.tolist()
+    cap = CONSTRAINTS.max_legs_per_bookie
+    for g in valid.tolist():
+        event = cols.events[int(cols.group_event[g])]
+        mkey = cols.market_keys[int(cols.group_market[g])]
+        fair = CONSENSUS.fair_probs(event.get('id'), mkey, cols.group_line_value(g)) if CONSENSUS_ENABLED else None
+        if cap is not None:
+            group_bookies = leg_bookie[leg_start[g]:leg_start[g + 1]]
+            if max(group_bookies.count(b) for b in group_bookies) > cap:
+                rows = np.flatnonzero((cols.group == g) if mask is None else (cols.group == g) & mask)
+                arb = compute_arbitrage(event, mkey, cols.outcomes_dict(rows), cols.group_line_value(g))
+                if arb is not None:
+                    results.append(arb)
+                continue
+        span = range(leg_start[g], leg_start[g + 1])
+        kelly = leg_kelly[span.start:span.stop] if fair is None else [
+            KELLY_FRACTION * f for f in kelly_allocation(
+                leg_price[span.start:span.stop], [fair[cols.outcome_keys[leg_outcome[i]]] for i in span])]
+        legs = []
+        for i, k in zip(span, kelly):
+            o = leg_outcome[i]
+            legs.append((Outcome(name=cols.outcome_names[o], price=leg_price[i],
+                                 bookie=cols.bookies[leg_bookie[i]], point=cols.outcome_points[o]),
+                         leg_stake[i], k))
+        results.append(build_result(event, mkey, legs, margin[g], profit_pct[g], cols.group_line_value(g)))
+    return results
+
+
+def analyse_columns(cols: OddsColumns, mask=None, filter_outliers: bool = True) -> list:
+    """Équivalent lot de filter_outlier_odds + compute_arbitrage sur chaque marché d'un OddsColumns."""
+    if filter_outliers:
+        mask = outlier_mask(cols, mask)
+    if CONSENSUS_ENABLED:
+        CONSENSUS.observe_columns(cols, mask)
+    if CONSTRAINTS.allowed is not None or CONSTRAINTS.excluded:
+        usable = np.array([CONSTRAINTS.usable(b) for b in cols.bookies], dtype=bool)
+        usable = usable[cols.bookie] if len(cols.bookies) else np.zeros(len(cols), dtype=bool)
+        mask = usable if mask is None else mask & usable
+    return batch_results(cols, arbitrage_kernel(cols, mask), mask)
+
+
+# ─────────────────────────────────────────────
+# STREAMING (DÉCODAGE JSON INCRÉMENTAL)
+# ─────────────────────────────────────────────
+_JSON_SEPARATORS = re.compile(r'[\s,]*')
+EVENT_META_KEYS = ('id', 'home_team', 'away_team', 'commence_time', '_sport')
+
+
+class JsonArrayStream:
+    """
+    Décodeur incrémental d'un tableau JSON de premier niveau.
+    feed(octets) retourne les éléments devenus complets ; seul l'élément en
+    cours de réception reste en mémoire. Un élément incomplet n'est redécodé
+    qu'une fois le tampon doublé, ce qui garde le coût total linéaire.
+    """
+
+    def __init__(self):
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._decoder = json.JSONDecoder()
+        self._buf = ''
+        self._retry_at = 0
+        self.opened = False
+        self.closed = False
+
+    def feed(self, chunk: bytes) -> list:
+        if chunk:
+            self._buf += self._utf8.decode(chunk)
+        items = []
+        buf = self._buf
+        if len(buf) < self._retry_at:
+            return items
+        pos = 0
+        self._retry_at = 0
+        while not self.closed:
+            pos = _JSON_SEPARATORS.match(buf, pos).end()
+            if pos >= len(buf):
+                break
+            if not self.opened:
+                if buf[pos] != '[':
+                    raise ValueError("Tableau JSON attendu en réponse")
+                self.opened = True
+                pos += 1
+                continue
+            if buf[pos] == ']':
+                self.closed = True
+                pos = len(buf)
+                break
+            try:
+                item, pos_end = self._decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # Élément encore incomplet : on attend que le tampon double
+                self._retry_at = 2 * (len(buf) - pos)
+                break
+            items.append(item)
+            pos = pos_end
+        self._buf = buf[pos:]
+        return items
+
+    def close(self) -> list:
+        """Fin du flux : décode le reliquat, erreur si le tableau est tronqué."""
+        self._buf += self._utf8.decode(b'', final=True)
+        self._retry_at = 0
+        items = self.feed(b'')
+        if not self.closed:
+            raise ValueError("Réponse JSON tronquée")
+        return items
+
+
+def extract_event(sport: str, event: dict) -> tuple:
+    """
+    Réduit un événement brut à (meta, marchés extraits) : seules les clés utilisées
+    par compute_arbitrage sont gardées, le dict brut peut être libéré aussitôt.
+    """
+    event['_sport'] = sport
+    meta = {k: event[k] for k in EVENT_META_KEYS if k in event}
+    return meta, extract_all_odds(event)
+
+
+def stream_sport_odds(sport, session):
+    """Générateur de (meta, marchés) décodés au fil du téléchargement."""
+    cached = None if split_regions() else cache_get(sport)
+    if cached is not None or needs_full_response():
+        # Cache et fusion multi-régions portent sur des réponses complètes : pas de streaming
+        for event in cached if cached is not None else fetch_sport_odds(sport, session):
+            yield extract_event(sport, event)
+        return
+    key = request_key(sport)
+    if key is None:
+        return
+    url, params = odds_request(sport, key)
+    # En streaming, le temps de fetch inclut l'analyse faite entre deux blocs
+    t0, nbytes, status = time.perf_counter(), 0, 'error'
+    try:
+        with session.get(url, params=params, timeout=REQUEST_TIMEOUT, stream=True) as resp:
+            status = resp.status_code
+            if not record_response(sport, resp.status_code, resp.headers, params['apiKey']):
+                return
+            parser = JsonArrayStream()
+            for chunk in resp.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                nbytes += len(chunk)
+                for event in parser.feed(chunk):
+                    yield extract_event(sport, event)
+            for event in parser.close():
+                yield extract_event(sport, event)
+    except (requests.RequestException, ValueError):
+        BREAKER.record_failure(sport)
+        return
+    finally:
+        METRICS.record_fetch(sport, status, nbytes, time.perf_counter() - t0)
+
+
+async def stream_sport_odds_async(sport, session, semaphore):
+    """Équivalent asynchrone de stream_sport_odds (générateur asynchrone)."""
+    if needs_full_response():
+        for event in await fetch_sport_odds_async(sport, session, semaphore):
+            yield extract_event(sport, event)
+        return
+    async with semaphore:
+        key = request_key(sport)
+        if key is None:
+            return
+        url, params = odds_request(sport, key)
+        # L'analyse se fait pendant la lecture : timeout entre deux lectures, pas global
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=REQUEST_TIMEOUT, sock_read=REQUEST_TIMEOUT)
+        t0, nbytes, status = time.perf_counter(), 0, 'error'
+        try:
+            async with session.get(url, params=params, timeout=timeout) as resp:
+                status = resp.status
+                if not record_response(sport, resp.status, resp.headers, params['apiKey']):
+                    return
+                parser = JsonArrayStream()
+                async for chunk in resp.content.iter_chunked(STREAM_CHUNK_SIZE):
+                    nbytes += len(chunk)
+                    for event in parser.feed(chunk):
+                        yield extract_event(sport, event)
+                for event in parser.close():
+                    yield extract_event(sport, event)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            BREAKER.record_failure(sport)
+            return
+        finally:
+            METRICS.record_fetch(sport, status, nbytes, time.perf_counter() - t0)
+
+
+# ─────────────────────────────────────────────
+# SWEEP ANALYSÉ SPORT PAR SPORT
+# ─────────────────────────────────────────────
+def fetch_sport_body(sport, session) -> Optional[bytes]:
+    """Corps /odds brut d'un sport, None si l'appel est refusé ou échoue."""
+    key = request_key(sport)
+    if key is None:
+        return None
+    url, params = odds_request(sport, key)
+    t0 = time.perf_counter()
+    try:
+        resp = session.get(url, params=params, timeout=REQUEST_TIMEOUT)
+    except requests.RequestException:
+        METRICS.record_fetch(sport, 'error', 0, time.perf_counter() - t0)
+        BREAKER.record_failure(sport)
+        return None
+    METRICS.record_fetch(sport, resp.status_code, len(resp.content), time.perf_counter() - t0)
+    if not record_response(sport, resp.status_code, resp.headers, params['apiKey']):
+        return None
+    return resp.content
+
+
+async def fetch_sport_body_async(sport, session, semaphore) -> Optional[bytes]:
+    async with semaphore:
+        key = request_key(sport)
+        if key is None:
+            return None
+        url, params = odds_request(sport, key)
+        t0 = time.perf_counter()
+        try:
+            async with session.get(url, params=params) as resp:
+                if not record_response(sport, resp.status, resp.headers, params['apiKey']):
+                    METRICS.record_fetch(sport, resp.status, 0, time.perf_counter() - t0)
+                    return None
+                body = await resp.read()
+                METRICS.record_fetch(sport, resp.status, len(body), time.perf_counter() - t0)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            METRICS.record_fetch(sport, 'error', 0, time.perf_counter() - t0)
+            BREAKER.record_failure(sport)
+            return None
+    return body
+
+
+def decode_sport_body(sport, body: Optional[bytes], decode):
+    """decode(sport, body), None si le corps est absent ou le JSON invalide."""
+    if body is None:
+        return None
+    try:
+        return decode(sport, body)
+    except ValueError:
+        BREAKER.record_failure(sport)
+        return None
+
+
+def fetch_sport_extracted(sport, session) -> list:
+    """Corps /odds lu en entier puis décodé par decode_extracted (backend rapide)."""
+    if needs_full_response():
+        return [extract_event(sport, event) for event in fetch_sport_odds(sport, session)]
+    return decode_sport_body(sport, fetch_sport_body(sport, session), decode_extracted) or []
+
+
+async def fetch_sport_extracted_async(sport, session, semaphore) -> list:
+    if needs_full_response():
+        return [extract_event(sport, event) for event in await fetch_sport_odds_async(sport, session, semaphore)]
+    return decode_sport_body(sport, await fetch_sport_body_async(sport, session, semaphore), decode_extracted) or []
+
+
+def decode_sport_columns(sport, body: bytes) -> OddsColumns:
+    return decode_columns([(sport, body)])
+
+
+def fetch_sport_columns(sport, session) -> OddsColumns:
+    """Équivalent colonnaire de fetch_sport_extracted : corps /odds → OddsColumns (decode_columns)."""
+    if needs_full_response():
+        return extract_columns(fetch_sport_odds(sport, session))
+    return decode_sport_body(sport, fetch_sport_body(sport, session), decode_sport_columns) or decode_columns([])
+
+
+async def fetch_sport_columns_async(sport, session, semaphore) -> OddsColumns:
+    if needs_full_response():
+        return extract_columns(await fetch_sport_odds_async(sport, session, semaphore))
+    body = await fetch_sport_body_async(sport, session, semaphore)
+    return decode_sport_body(sport, body, decode_sport_columns) or decode_columns([])
+
+
+def analyse_and_emit(meta: dict, markets: dict, on_result=None) -> list:
+    """analyse_extracted + envoi immédiat de chaque résultat au callback on_result."""
+    results = analyse_extracted(meta, markets)
+    if on_result is not None:
+        for r in results:
+            on_result(r)
+    return results
+
+
+def analyse_columns_and_emit(cols: OddsColumns, on_result=None) -> list:
+    """analyse_columns sur les cotes d'un sport + envoi de chaque résultat à on_result."""
+    results = analyse_columns(cols)
+    if METRICS_ENABLED:
+        METRICS.inc('events', len(cols.events))
+        METRICS.inc('results', len(results))
+        METRICS.inc('surebets', sum(r.is_surebet for r in results))
+    if on_result is not None:
+        for r in results:
+            on_result(r)
+    return results
+
+
+def fan_out(*callbacks):
+    """Callback on_result unique qui relaie chaque résultat aux callbacks donnés (None ignorés)."""
+    callbacks = [c for c in callbacks if c is not None]
+
+    def emit(r: ArbitrageResult):
+        for callback in callbacks:
+            callback(r)
+    return emit
+
+
+def _scan_sport(sport, session, stream, on_result=None, columnar=False, keep=False) -> tuple:
+    """(nb événements, résultats du sport) ; résultats gardés seulement si keep, sinon seul on_result les voit."""
+    if columnar:
+        cols = fetch_sport_columns(sport, session)
+        results = analyse_columns_and_emit(cols, on_result)
+        return len(cols.events), results if keep else []
+    n_events, results = 0, []
+    extracted = stream_sport_odds(sport, session) if stream else fetch_sport_extracted(sport, session)
+    for meta, markets in extracted:
+        n_events += 1
+        event_results = analyse_and_emit(meta, markets, on_result)
+        if keep:
+            results.extend(event_results)
+    return n_events, results
+
+
+def _sweep_threaded(scan) -> tuple:
+    """
+    Sweep de tous les sports actifs sur le pool de threads : scan(sport, session)
+    retourne (nb événements, éléments) ; retourne (total, éléments concaténés).
+    """
+    session = make_session()
+    sports = fetch_sports(session)
+    if not sports:
+        print("   ✗ Aucun sport actif trouvé.")
+        return 0, []
+    sports = plan_sweep(sports)
+
+    total, items = 0, []
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {executor.submit(scan, sport, session): sport for sport in sports}
+        for future in as_completed(futures):
+            sport = futures[future]
+            try:
+                n_events, sport_items = future.result()
+            except Exception as e:
+                print(f"   ✗ {sport}: {e}")
+                continue
+            total += n_events
+            items.extend(sport_items)
+            if n_events:
+                print(f"   ✓ {sport}: {n_events} événements")
+    return total, items
+
+
+async def _sweep_async(scan) -> tuple:
+    """Équivalent asynchrone de _sweep_threaded : scan(sport, session, semaphore) est une coroutine."""
+    async with make_async_session() as session:
+        sports = await fetch_sports_async(session)
+        if not sports:
+            print("   ✗ Aucun sport actif trouvé.")
+            return 0, []
+        sports = plan_sweep(sports)
+
+        semaphore = asyncio.Semaphore(ASYNC_CONCURRENCY)
+
+        async def scan_one(sport):
+            return sport, *await scan(sport, session, semaphore)
+
+        total, items = 0, []
+        for task in asyncio.as_completed([scan_one(s) for s in sports]):
+            try:
+                sport, n_events, sport_items = await task
+            except Exception as e:
+                print(f"   ✗ {e}")
+                continue
+            total += n_events
+            items.extend(sport_items)
+            if n_events:
+                print(f"   ✓ {sport}: {n_events} événements")
+    return total, items
+
+
+async def _scan_sport_async(sport, session, semaphore, stream, on_result=None,
+                            columnar=False, keep=False) -> tuple:
+    if columnar:
+        cols = await fetch_sport_columns_async(sport, session, semaphore)
+        results = analyse_columns_and_emit(cols, on_result)
+        return len(cols.events), results if keep else []
+    n_events, results = 0, []
+
+    def analyse(meta, markets):
+        event_results = analyse_and_emit(meta, markets, on_result)
+        if keep:
+            results.extend(event_results)
+
+    if stream:
+        async for meta, markets in stream_sport_odds_async(sport, session, semaphore):
+            n_events += 1
+            analyse(meta, markets)
+    else:
+        for meta, markets in await fetch_sport_extracted_async(sport, session, semaphore):
+            n_events += 1
+            analyse(meta, markets)
+    return n_events, results
+
+
+def fetch_all_sports_odds() -> list:
+    """
+    Événements bruts de tous les sports actifs, avec le moteur FETCH_ENGINE
+    (repli sur les threads si aiohttp n'est pas installé).
+    """
+    if FETCH_ENGINE == 'async' and aiohttp is not None:
+        async def fetch_one(sport, session, semaphore):
+            events = await fetch_sport_odds_async(sport, session, semaphore)
+            return len(events), events
+        return asyncio.run(_sweep_async(fetch_one))[1]
+
+    def fetch_one(sport, session):
+        events = fetch_sport_odds(sport, session)
+        return len(events), events
+    return _sweep_threaded(fetch_one)[1]
+
+
+def scan_all_sports(stream: bool = False, on_result=None, columnar: bool = False,
+                    keep_results: bool = False) -> tuple:
+    """
+    Sweep complet analysé sport par sport ; seuls les résultats sont conservés.
+    stream=True : chaque événement est décodé, extrait et analysé dès sa réception,
+    la mémoire crête ne dépend donc plus du nombre de sports.
+    stream=False : corps complet décodé par le backend rapide (decode_extracted).
+    columnar=True : corps de chaque sport décodé en colonnes (decode_columns) puis
+    analysé en lot par analyse_columns (numpy requis, ni middles ni value bets) ;
+    prioritaire sur stream.
+    on_result(r) est appelé pour chaque résultat dès qu'il est calculé, pendant que
+    les autres sports se téléchargent encore (depuis les threads workers en mode threads).
+    Retourne (nb événements, résultats) ; la liste des résultats n'est construite
+    que si keep_results (mémoire O(N)), sinon elle est vide et seul on_result les voit.
+    """
+    if FETCH_ENGINE == 'async' and aiohttp is not None:
+        return asyncio.run(_sweep_async(lambda sport, session, semaphore: _scan_sport_async(
+            sport, session, semaphore, stream, on_result, columnar, keep_results)))
+    return _sweep_threaded(lambda sport, session: _scan_sport(
+        sport, session, stream, on_result, columnar, keep_results))
+
+
+# ─────────────────────────────────────────────
+# SUIVI DES ÉVÉNEMENTS CHAUDS (ENDPOINT PAR ÉVÉNEMENT)
+# ─────────────────────────────────────────────
+class EventGone(Exception):
+    """404 sur l'endpoint par événement : match terminé ou retiré."""
+
+
+def fetch_event_odds(sport: str, event_id: str, session, markets=None) -> Optional[dict]:
+    """
+    Cotes d'un seul événement via /sports/{sport}/events/{id}/odds (None si
+    indisponible). Lève EventGone si l'événement n'existe plus.
+    """
+    key = request_key(sport)
+    if key is None:
+        return None
+    url = f'{API_BASE_URL}/sports/{sport}/events/{event_id}/odds'
+    params = {
+        'apiKey': key,
+        'regions': REGIONS,
+        'markets': ','.join(sorted(markets)) if markets else MARKETS,
+        'oddsFormat': 'decimal'
+    }
+    t0 = time.perf_counter()
+    try:
+        resp = session.get(url, params=params, timeout=REQUEST_TIMEOUT)
+        METRICS.record_fetch(sport, resp.status_code, len(resp.content), time.perf_counter() - t0)
+        if resp.status_code == 404:
+            # Événement terminé ou retiré : pas un problème de santé du sport
+            record_quota(params['apiKey'], resp.status_code, resp.headers, cost=request_cost(params))
+            BREAKER.release(sport)
+            raise EventGone(event_id)
+        if not record_response(sport, resp.status_code, resp.headers, params['apiKey'],
+                               track_cost=False, cost=request_cost(params)):
+            return None
+        event = json_loads(resp.content)
+    except (requests.RequestException, ValueError):
+        BREAKER.record_failure(sport)
+        return None
+    event['_sport'] = sport
+    return event
+
+
+@dataclass
+class HotEvent:
+    sport: str
+    event_id: str
+    markets: set
+    best_profit: float
+    level: int = 0                    # Index dans HOT_INTERVALS
+    misses: int = 0
+    due: float = 0.0                  # Prochain poll (time.monotonic)
+
+
+class HotEventTracker:
+    """
+    Suit les quasi-surebets détectés par les sweeps et les re-polle seuls, via
+    l'endpoint par événement (marchés concernés uniquement), à haute fréquence.
+    Profit en hausse ou surebet → intervalle le plus court ; en baisse → escalade
+    vers des intervalles plus longs ; sous HOT_DROP_PROFIT_PCT HOT_MAX_MISSES
+    fois de suite (ou événement disparu) → abandon.
+    """
+
+    def __init__(self):
+        self.events: dict = {}        # (sport, event_id) -> HotEvent
+        self.polled: set = set()      # (event_id, marché) effectivement re-pollés au dernier poll
+
+    def observe(self, results: list):
+        now = time.monotonic()
+        for r in results:
+            # Value bets exclus : leur espérance (≥ MIN_VALUE_EDGE_PCT) passerait toujours le seuil
+            if r.event_id is None or r.fair_price is not None or r.profit_pct < HOT_MIN_PROFIT_PCT:
+                continue
+            h = self.events.get((r.sport, r.event_id))
+            if h is not None:
+                h.markets.add(r.market)
+                h.best_profit = max(h.best_profit, r.profit_pct)
+                continue
+            if len(self.events) >= HOT_MAX_EVENTS:
+                weakest = min(self.events.values(), key=lambda e: e.best_profit)
+                if weakest.best_profit >= r.profit_pct:
+                    continue
+                del self.events[(weakest.sport, weakest.event_id)]
+            self.events[(r.sport, r.event_id)] = HotEvent(
+                r.sport, r.event_id, {r.market}, r.profit_pct, due=now + HOT_INTERVALS[0]
+            )
+
+    def next_due(self) -> Optional[float]:
+        return min((h.due for h in self.events.values()), default=None)
+
+    def _update(self, h: HotEvent, results: list, now: float):
+        best = max((r.profit_pct for r in results), default=None)
+        if best is None or best < HOT_DROP_PROFIT_PCT:
+            h.misses += 1
+            if h.misses >= HOT_MAX_MISSES:
+                del self.events[(h.sport, h.event_id)]
+                return
+            h.level = min(h.level + 1, len(HOT_INTERVALS) - 1)
+        else:
+            h.misses = 0
+            if best >= 0 or best >= h.best_profit:
+                h.level = 0
+            else:
+                h.level = min(h.level + 1, len(HOT_INTERVALS) - 1)
+            h.best_profit = best
+        h.due = now + HOT_INTERVALS[h.level]
+
+    def poll(self, session, executor) -> list:
+        """Re-polle les événements arrivés à échéance ; retourne leurs résultats à jour."""
+        now = time.monotonic()
+        due = [h for h in self.events.values() if h.due <= now]
+        self.polled = set()
+        if not due or not KEYS.available():
+            return []                 # Clés en pause : les événements attendent sans compter de raté
+        futures = {
+            executor.submit(fetch_event_odds, h.sport, h.event_id, session, h.markets): h
+            for h in due
+        }
+        all_results = []
+        for future in as_completed(futures):
+            h = futures[future]
+            try:
+                event = future.result()
+            except EventGone:
+                del self.events[(h.sport, h.event_id)]
+                continue
+            except Exception as e:
+                print(f"   ✗ {h.sport}/{h.event_id}: {e}")
+                event = None
+            results = [] if event is None else [
+                r for r in analyse_events([event]) if r.market in h.markets and r.fair_price is None
+            ]
+            if event is not None:
+                self.polled.update((h.event_id, m) for m in h.markets)
+            self._update(h, results, time.monotonic())
+            all_results.extend(results)
+        return all_results
+
+
+# ─────────────────────────────────────────────
+# MODE DAEMON (POLLING ADAPTATIF)
+# ─────────────────────────────────────────────
+def poll_interval(events: list, now: Optional[datetime] = None) -> int:
+    """
+    Intervalle de polling d'un sport d'après le commence_time de ses événements.
+    Le match le plus proche (ou déjà en cours) détermine le palier de POLL_TIERS.
+    """
+    now = now or datetime.now(timezone.utc)
+    deltas = []
+    for event in events:
+        dt = parse_commence(event.get('commence_time', ''))
+        if dt is not None:
+            deltas.append(max((dt - now).total_seconds(), 0.0))
+    if not deltas:
+        return POLL_IDLE_INTERVAL
+    soonest = min(deltas)
+    for horizon, interval in POLL_TIERS:
+        if soonest < horizon:
+            return interval
+    return POLL_IDLE_INTERVAL
+
+
+def run_daemon(sinks: list = ()):
+    """
+    Scanner continu : chaque sport est re-pollé à son propre intervalle (poll_interval).
+    Chaque fenêtre de DAEMON_WINDOWS est pollée séparément : la fenêtre courte, dont
+    les matchs sont proches, tombe naturellement dans les paliers rapides de POLL_TIERS.
+    Les quasi-surebets sont ensuite suivis individuellement par HotEventTracker.
+    La session HTTP, le pool de threads et la liste des sports restent chauds entre les cycles.
+    Les résultats de chaque cycle sont écrits dans les sinks, vidés en fin de cycle.
+    """
+    session = make_session()
+    hot = HotEventTracker()
+    windows = DAEMON_WINDOWS or [None]
+    schedule: list = []            # tas de (échéance monotonic, sport, index de fenêtre)
+    intervals: dict = {}           # (sport, fenêtre) -> dernier intervalle de polling normal
+    known_sports: set = set()
+    sports_refreshed_at = None
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        while True:
+            now = time.monotonic()
+
+            if sports_refreshed_at is None or now - sports_refreshed_at >= SPORTS_REFRESH_INTERVAL:
+                sports = fetch_sports(session)
+                sports_refreshed_at = now
+                for sport in sports:
+                    if sport not in known_sports:
+                        for w in range(len(windows)):
+                            heapq.heappush(schedule, (now, sport, w))
+                known_sports.update(sports)
+
+            hot_results = hot.poll(session, executor)
+            if hot.polled:
+                # Seuls les marchés demandés à l'endpoint par événement sont remplacés
+                PORTFOLIO.update(hot_results, markets=hot.polled)
+                PORTFOLIO.solve()
+            if hot_results:
+                emit_results(sinks, hot_results)
+                stamp = datetime.now().strftime('%H:%M:%S')
+                print(f"\n🔥 [{stamp}] {len(hot.events)} événement(s) chaud(s) suivi(s), "
+                      f"{len(hot_results)} opportunité(s) à jour")
+                display_results(hot_results)
+
+            due = []
+            while schedule and schedule[0][0] <= now:
+                due.append(heapq.heappop(schedule)[1:])
+            if not due:
+                wake_at = [sports_refreshed_at + SPORTS_REFRESH_INTERVAL]
+                if schedule:
+                    wake_at.append(schedule[0][0])
+                if hot.next_due() is not None:
+                    wake_at.append(hot.next_due())
+                time.sleep(max(min(wake_at) - now, 0.0))
+                continue
+
+            # Circuit ouvert : le sport revient à l'échéance de son backoff
+            for sport, w in [d for d in due if BREAKER.is_open(d[0])]:
+                heapq.heappush(schedule, (now + BREAKER.remaining(sport), sport, w))
+            due = [d for d in due if not BREAKER.is_open(d[0])]
+
+            # Toutes les clés en pause 429 (ou épuisées) : les sports reviennent à la fin de la pause
+            wait = KEYS.cooldown()
+            if wait:
+                for sport, w in due:
+                    heapq.heappush(schedule, (now + min(wait, POLL_IDLE_INTERVAL), sport, w))
+                continue
+
+            # Budget quota : les sports à faible rendement attendent un cycle idle
+            due, skipped = QUOTA.plan(due, key=lambda d: d[0])
+            _report_skipped(skipped)
+            for sport, w in skipped:
+                heapq.heappush(schedule, (now + POLL_IDLE_INTERVAL, sport, w))
+            if not due:
+                continue
+
+            results = []
+            polled_ids = set()
+            futures = {
+                executor.submit(fetch_sport_odds, sport, session, windows[w]): (sport, w)
+                for sport, w in due
+            }
+            for future in as_completed(futures):
+                sport, w = futures[future]
+                try:
+                    events = future.result()
+                except Exception as e:
+                    print(f"   ✗ {sport}: {e}")
+                    events = []
+                delay = BREAKER.retry_delay(sport)
+                if delay is None or events or (sport, w) not in intervals:
+                    intervals[sport, w] = poll_interval(events)
+                # Backoff à partir de l'intervalle normal (le plus court des fenêtres du sport)
+                BREAKER.set_interval(sport, min(intervals.get((sport, x), math.inf) for x in range(len(windows))))
+                interval = intervals[sport, w] if delay is None else max(intervals[sport, w], delay)
+                heapq.heappush(schedule, (time.monotonic() + interval, sport, w))
+                polled_ids.update(e['id'] for e in events if e.get('id') is not None)
+                sport_results = analyse_events(events)
+                QUOTA.record_yield(sport, sport_results)
+                results.extend(sport_results)
+
+            emit_results(sinks, results)
+            hot.observe(results)
+            CONSENSUS.prune()
+            PORTFOLIO.update(results, event_ids=polled_ids)
+            PORTFOLIO.solve()
+            stamp = datetime.now().strftime('%H:%M:%S')
+            print(f"\n🔄 [{stamp}] {len(due)} sport(s) re-pollé(s), {len(results)} opportunité(s)")
+            if results:
+                display_results(results)
+
+
 # ─────────────────────────────────────────────
 # AFFICHAGE
 # ─────────────────────────────────────────────
-def display_results(results: list):
-    # Trier : surebets d'abord, puis par profit décroissant
-    results.sort(key=lambda r: (-int(r.is_surebet), -r.profit_pct))
-    top = results[:TOP_N]
+class TopResults:
+    """
+    Collecteur top-K en flux, branché en callback on_result sur l'étape de calcul :
+    tas min des K meilleurs (surebets d'abord, puis profit décroissant, premier
+    arrivé à égalité), O(log K) par résultat, sans garder ni trier les N résultats.
+    Les value bets, dont le profit_pct est une espérance, ont leur propre top K.
+    """
+
+    def __init__(self, k: int = None):
+        self.k = TOP_N if k is None else k
+        self.count = 0
+        self._heap: list = []         # (surebet, profit, -rang d'arrivée, résultat)
+        self._value_heap: list = []   # Idem pour les value bets
+        self._lock = threading.Lock()
+
+    def __call__(self, r: ArbitrageResult):
+        with self._lock:
+            self._push(r)
+
+    def _push(self, r: ArbitrageResult):
+        heap = self._heap if r.fair_price is None else self._value_heap
+        self.count += 1
+        if len(heap) < self.k:
+            heapq.heappush(heap, (r.is_surebet, r.profit_pct, -self.count, r))
+        elif heap and (r.is_surebet, r.profit_pct) > heap[0][:2]:
+            # Le rang d'arrivée ne départage que les égalités : tout nouveau venu y perd
+            heapq.heapreplace(heap, (r.is_surebet, r.profit_pct, -self.count, r))
+
+    def extend(self, results) -> 'TopResults':
+        with self._lock:
+            for r in results:
+                self._push(r)
+        return self
+
+    def __len__(self) -> int:
+        return self.count
+
+    def top(self) -> list:
+        """Les K meilleurs arbitrages (surebets et quasi-surebets), du meilleur au moins bon."""
+        return [entry[3] for entry in sorted(self._heap, key=lambda e: e[:3], reverse=True)]
+
+    def top_values(self) -> list:
+        """Les K meilleurs value bets, par espérance décroissante."""
+        return [entry[3] for entry in sorted(self._value_heap, key=lambda e: e[:3], reverse=True)]
+
+
+@lru_cache(maxsize=4096)
+def format_commence(commence_raw: str) -> str:
+    """'2024-05-01T18:00:00Z' -> '01/05/2024 18:00' (brut si invalide)."""
+    commence_dt = parse_commence(commence_raw)
+    return commence_dt.strftime('%d/%m/%Y %H:%M') if commence_dt else commence_raw
+
+
+@instrumented('display')
+def display_results(results: Union[list, TopResults]):
+    # Surebets d'abord, puis par profit décroissant : seuls les TOP_N affichés sont triés et formatés
+    collector = results if isinstance(results, TopResults) else TopResults().extend(results)
+    top = collector.top()
 
     surebets = [r for r in top if r.is_surebet]
     near     = [r for r in top if not r.is_surebet]
+    values   = collector.top_values()
 
     print("\n" + "═" * 70)
-    print(f"  🎯  RÉSULTATS — {len(results)} opportunités analysées  |  Top {TOP_N} affichés")
+    print(f"  🎯  RÉSULTATS — {len(collector)} opportunités analysées  |  Top {collector.k} affichés")
     print("═" * 70)
 
     if surebets:
@@ -266,58 +3153,429 @@ def display_results(results: list):
         print("\n⚠️  Aucun surebet confirmé (margin < 1.0) trouvé.")
 
     if near:
-        print(f"\n📊  QUASI-SUREBETS / VALEUR ({len(near)})\n" + "─" * 70)
+        print(f"\n📊  QUASI-SUREBETS ({len(near)})\n" + "─" * 70)
         for r in near:
             _print_result(r)
 
+    if values:
+        print(f"\n💎  VALUE BETS ({len(values)})\n" + "─" * 70)
+        for r in values:
+            _print_result(r)
+
     print("═" * 70)
 
 
+class LivePrinter:
+    """
+    Callback on_result du mode --pipeline : affiche chaque surebet dès qu'il est
+    trouvé et mesure le délai avant le premier (time-to-first-surebet).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.t0 = time.perf_counter()
+        self.first_at: Optional[float] = None
+        self.count = 0
+
+    def __call__(self, r: ArbitrageResult):
+        if not r.is_surebet:
+            return
+        with self._lock:
+            elapsed = time.perf_counter() - self.t0
+            if self.first_at is None:
+                self.first_at = elapsed
+            self.count += 1
+            print(f"\n⚡ [+{elapsed:.2f}s]", end='')
+            _print_result(r)
+
+
+def market_label(r: ArbitrageResult) -> str:
+    """'h2h', 'totals 2.5', 'spreads Home -1.5'."""
+    if r.fair_price is not None:
+        return f"{r.market} value bet" if r.line is None else f"{r.market} {r.line:g} value bet"
+    if r.middle_pct is not None:
+        return f"{r.market} middle {r.bets[0].point:+g} / {r.bets[1].point:+g}"
+    if r.line is None:
+        return r.market
+    if LINE_MARKETS.get(r.market) == 'spreads':
+        return f"{r.market} {r.match.split(' vs ')[0]} {r.line:+g}"
+    return f"{r.market} {r.line:g}"
+
+
 def _print_result(r: ArbitrageResult):
-    tag = "🟢 SUREBET" if r.is_surebet else "🔵 VALUE"
+    tag = "🟢 SUREBET" if r.is_surebet else "💎 VALUE BET" if r.fair_price is not None else "🔵 VALUE"
     print(f"\n{tag}  {r.match}")
     print(f"   Sport    : {r.sport}")
-    print(f"   Marché   : {r.market}")
-    print(f"   Date     : {r.commence}")
-    print(f"   Marge    : {r.margin:.4f}  |  Profit : {r.profit_pct:+.3f}%  ({r.profit_eur:+.2f}€ pour {TOTAL_INVESTMENT}€)")
+    print(f"   Marché   : {market_label(r)}")
+    print(f"   Date     : {format_commence(r.commence)}")
+    if r.fair_price is not None:
+        print(f"   Valeur   : cote juste {r.fair_price:.3f}  |  Espérance : {r.profit_pct:+.3f}%  ({r.profit_eur:+.2f}€ pour la mise Kelly)")
+    else:
+        print(f"   Marge    : {r.margin:.4f}  |  Profit : {r.profit_pct:+.3f}%  ({r.profit_eur:+.2f}€ pour {TOTAL_INVESTMENT}€)")
+    if r.middle_pct is not None:
+        print(f"   Middle   : {r.middle_pct:+.3f}% si le score tombe entre les deux lignes (bornes incluses)")
     for bet in r.bets:
-        pt = f" @ {bet['point']}" if bet['point'] is not None else ""
-        print(f"   ├─ [{bet['bookie']}]  {bet['outcome']}{pt}  →  cote {bet['cote']}  |  mise {bet['mise']}€  →  gain {bet['gain']}€")
+        pt = f" @ {bet.point}" if bet.point is not None else ""
+        print(f"   ├─ [{bet.bookie}]  {bet.outcome}{pt}  →  cote {bet.cote}  |  mise {bet.mise:.2f}€  →  gain {bet.gain:.2f}€")
     if r.kelly_stakes:
-        ks = "  |  ".join(f"{k}: {v}€" for k, v in r.kelly_stakes.items())
+        ks = "  |  ".join(f"{k}: {v:.2f}€" for k, v in r.kelly_stakes.items())
         print(f"   └─ Kelly ({int(KELLY_FRACTION*100)}%) : {ks}")
     print()
 
 
+# ─────────────────────────────────────────────
+# SORTIES EN FLUX (JSONL / CSV / PARQUET)
+# ─────────────────────────────────────────────
+RESULT_FIELDS = ('sport', 'match', 'commence', 'market', 'line', 'profit_pct', 'profit_eur', 'margin',
+                 'is_surebet', 'middle_pct', 'fair_price', 'event_id')
+LEG_FIELDS = ('leg', 'outcome', 'point', 'bookie', 'cote', 'mise', 'gain', 'kelly')
+
+
+def result_record(r: ArbitrageResult) -> dict:
+    """Enregistrement JSON d'un résultat, jambes imbriquées (valeurs brutes, non arrondies)."""
+    record = {f: getattr(r, f) for f in RESULT_FIELDS}
+    kelly = r.kelly_stakes or {}
+    record['bets'] = [dict(bet._asdict(), kelly=kelly.get(bet.outcome)) for bet in r.bets]
+    return record
+
+
+def leg_rows(r: ArbitrageResult) -> list:
+    """Lignes à plat d'un résultat, une par jambe : RESULT_FIELDS + LEG_FIELDS."""
+    head = tuple(getattr(r, f) for f in RESULT_FIELDS)
+    kelly = r.kelly_stakes or {}
+    return [head + (i,) + bet + (kelly.get(bet.outcome),) for i, bet in enumerate(r.bets)]
+
+
+class ResultSink(ABC):
+    """
+    Sortie en flux : callback on_result thread-safe, qui écrit chaque résultat dès
+    qu'il est calculé (mises Kelly par marché, avant la répartition du portefeuille).
+    write() retourne True si le résultat a été écrit (seuls ceux-là sont comptés dans count),
+    flush() pousse les tampons, close() termine le fichier.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, r: ArbitrageResult):
+        with self._lock:
+            if self.write(r):
+                self.count += 1
+
+    @abstractmethod
+    def write(self, r: ArbitrageResult) -> bool:
+        ...
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class JsonlSink(ResultSink):
+    """Un objet JSON par ligne, dans un fichier (ajout) ou un pipe ; '-' = sortie standard."""
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._own = path != '-'
+        self._f = open(path, 'ab', buffering=SINK_BUFFER_SIZE) if self._own else sys.stdout.buffer
+        self._dumps = orjson.dumps if orjson is not None else (
+            lambda obj: json.dumps(obj, ensure_ascii=False).encode('utf-8'))
+
+    def write(self, r: ArbitrageResult) -> bool:
+        if self._f is None:
+            return False
+        try:
+            self._f.write(self._dumps(result_record(r)) + b'\n')
+            return True
+        except BrokenPipeError:
+            self._f = None            # Lecteur parti (ex : | head) : on cesse d'écrire
+            return False
+
+    def flush(self):
+        with self._lock:
+            if self._f is not None:
+                try:
+                    self._f.flush()
+                except BrokenPipeError:
+                    self._f = None
+
+    def close(self):
+        self.flush()
+        if self._own and self._f is not None:
+            self._f.close()
+
+
+class CsvSink(ResultSink):
+    """CSV à plat (une ligne par jambe) en mode ajout ; l'en-tête n'est écrit que dans un fichier vide."""
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._f = open(path, 'a', newline='', encoding='utf-8', buffering=SINK_BUFFER_SIZE)
+        self._writer = csv.writer(self._f)
+        if self._f.tell() == 0:
+            self._writer.writerow(RESULT_FIELDS + LEG_FIELDS)
+
+    def write(self, r: ArbitrageResult) -> bool:
+        self._writer.writerows(leg_rows(r))
+        return True
+
+    def flush(self):
+        with self._lock:
+            self._f.flush()
+
+    def close(self):
+        self._f.close()
+
+
+class ParquetSink(ResultSink):
+    """
+    Parquet à plat (une ligne par jambe), écrit par row groups de PARQUET_ROW_GROUP
+    lignes : seul le row group en cours reste en mémoire. Le fichier est remplacé,
+    et lisible une fois close() appelé (pied de page Parquet).
+    """
+
+    SCHEMA_TYPES = {
+        'sport': 'string', 'match': 'string', 'commence': 'string', 'market': 'string',
+        'line': 'float64', 'profit_pct': 'float64', 'profit_eur': 'float64', 'margin': 'float64',
+        'is_surebet': 'bool', 'middle_pct': 'float64', 'fair_price': 'float64', 'event_id': 'string',
+        'leg': 'int32', 'outcome': 'string', 'point': 'float64', 'bookie': 'string',
+        'cote': 'float64', 'mise': 'float64', 'gain': 'float64', 'kelly': 'float64',
+    }
+
+    def __init__(self, path: str, row_group_size: int = PARQUET_ROW_GROUP):
+        if pa is None:
+            raise RuntimeError("pyarrow n'est pas installé (pip install pyarrow)")
+        super().__init__(path)
+        self.row_group_size = row_group_size
+        self.schema = pa.schema([(name, pa.type_for_alias(t)) for name, t in self.SCHEMA_TYPES.items()])
+        self._writer = pq.ParquetWriter(path, self.schema)
+        self._rows: list = []
+
+    def write(self, r: ArbitrageResult) -> bool:
+        self._rows.extend(leg_rows(r))
+        if len(self._rows) >= self.row_group_size:
+            self._write_row_group()
+        return True
+
+    def _write_row_group(self):
+        if not self._rows:
+            return
+        columns = list(zip(*self._rows))
+        self._writer.write_table(pa.table(
+            [pa.array(col, type=f.type) for col, f in zip(columns, self.schema)], schema=self.schema))
+        self._rows = []
+
+    def close(self):
+        with self._lock:
+            self._write_row_group()
+            self._writer.close()
+
+
+def emit_results(sinks: list, results: list):
+    """Écrit un lot de résultats dans chaque sink puis vide les tampons (mode daemon)."""
+    for sink in sinks:
+        for r in results:
+            sink(r)
+        sink.flush()
+
+
+def open_sinks(jsonl: Optional[str] = None, csv_path: Optional[str] = None,
+               parquet: Optional[str] = None, row_group_size: int = PARQUET_ROW_GROUP) -> list:
+    """Sorties demandées en ligne de commande ; une sortie impossible est signalée et ignorée."""
+    sinks = []
+    for factory, path in ((JsonlSink, jsonl), (CsvSink, csv_path),
+                          (lambda p: ParquetSink(p, row_group_size), parquet)):
+        if not path:
+            continue
+        try:
+            sinks.append(factory(path))
+        except (OSError, RuntimeError) as e:
+            print(f"   ✗ Sortie {path} ignorée : {e}")
+    return sinks
+
+
 # ─────────────────────────────────────────────
 # POINT D'ENTRÉE
 # ─────────────────────────────────────────────
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Arbitrage sportif — The-Odds-API")
+    parser.add_argument('--daemon', action='store_true',
+                        help="scan continu avec polling adaptatif par sport")
+    parser.add_argument('--cache', action='store_true',
+                        help="active le cache disque des réponses /odds")
+    parser.add_argument('--cache-ttl', type=int, default=CACHE_TTL,
+                        help=f"validité du cache en secondes (défaut {CACHE_TTL})")
+    parser.add_argument('--replay', action='store_true',
+                        help="rejoue les snapshots du cache, sans aucun appel réseau")
+    parser.add_argument('--engine', choices=('async', 'threads'), default=FETCH_ENGINE,
+                        help="moteur de fetch du sweep : aiohttp ou pool de threads (défaut : %(default)s)")
+    parser.add_argument('--stream', action='store_true',
+                        help="décode et analyse chaque événement au fil du téléchargement (mémoire constante)")
+    parser.add_argument('--columnar', action='store_true',
+                        help="décode chaque sport en colonnes numpy et l'analyse en lot (ni middles ni value bets)")
+    parser.add_argument('--pipeline', action='store_true',
+                        help="affiche chaque surebet dès qu'il est trouvé, sans attendre la fin du sweep")
+    parser.add_argument('--window', metavar='DE:A',
+                        help="fenêtre de début des matchs en heures depuis maintenant (ex: :6, 6:168)")
+    parser.add_argument('--event-ids', metavar='ID,ID',
+                        help="ne récupère que ces événements (paramètre eventIds)")
+    parser.add_argument('--regions', default=REGIONS,
+                        help=f"régions des bookmakers, séparées par des virgules (défaut {REGIONS})")
+    parser.add_argument('--outlier-rule', choices=('zscore', 'mad'), default=OUTLIER_RULE,
+                        help="filtre des cotes aberrantes : z-score ou médiane/MAD (défaut : %(default)s)")
+    parser.add_argument('--middles', action='store_true',
+                        help="cherche aussi middles et surebets inter-lignes sur spreads/totals")
+    parser.add_argument('--value-bets', action='store_true',
+                        help="cherche aussi les cotes au-dessus du prix juste du consensus des bookmakers")
+    parser.add_argument('--consensus', action='store_true',
+                        help="tient le consensus des bookmakers pour des mises Kelly sur prix justes "
+                             "(implicite avec --value-bets et --daemon)")
+    parser.add_argument('--sharp-weight', type=float, default=SHARP_WEIGHT,
+                        help="poids des books sharp (pinnacle, exchanges) dans le consensus (défaut : %(default)s)")
+    parser.add_argument('--max-exposure', type=float, default=MAX_EXPOSURE,
+                        help="part de la bankroll engagée au plus sur l'ensemble des mises Kelly (défaut : %(default)s)")
+    parser.add_argument('--bookmakers', metavar='BOOK,BOOK',
+                        help="ne parie que chez ces bookmakers (clés The-Odds-API)")
+    parser.add_argument('--exclude-bookmakers', metavar='BOOK,BOOK',
+                        help="bookmakers exclus (compte limité ou fermé)")
+    parser.add_argument('--max-legs-per-bookmaker', type=int, metavar='N',
+                        help="au plus N jambes d'un même pari chez un bookmaker (1 : tous différents)")
+    parser.add_argument('--split-regions', action='store_true',
+                        help="un appel par région puis fusion des événements (bookmakers dédupliqués)")
+    parser.add_argument('--base-url', default=API_BASE_URL,
+                        help="URL de l'API (ex: http://127.0.0.1:8000/v4 pour le mock local)")
+    parser.add_argument('--api-keys', metavar='CLÉ,CLÉ',
+                        help="clés API utilisées en rotation (défaut : ODDS_API_KEYS, puis .env)")
+    parser.add_argument('--env-file', default=ENV_FILE,
+                        help=f"fichier .env lu pour ODDS_API_KEYS / ODDS_API_KEY (défaut {ENV_FILE})")
+    parser.add_argument('--jsonl', metavar='FICHIER',
+                        help="écrit chaque résultat en JSON (une ligne par résultat) dans ce fichier ou pipe ; - : stdout")
+    parser.add_argument('--csv', metavar='FICHIER',
+                        help="ajoute chaque résultat à ce CSV (une ligne par jambe)")
+    parser.add_argument('--parquet', metavar='FICHIER',
+                        help="écrit les résultats dans ce fichier Parquet (une ligne par jambe, pyarrow requis)")
+    parser.add_argument('--parquet-row-group', type=int, default=PARQUET_ROW_GROUP, metavar='N',
+                        help=f"lignes par row group Parquet (défaut {PARQUET_ROW_GROUP})")
+    parser.add_argument('--metrics', action='store_true',
+                        help="affiche le temps et les compteurs par étape en fin de run")
+    parser.add_argument('--metrics-json', metavar='FICHIER',
+                        help="écrit les métriques en JSON dans ce fichier en fin de run")
+    parser.add_argument('--metrics-port', type=int, metavar='PORT',
+                        help=f"sert /metrics (Prometheus) et /metrics.json sur {METRICS_HOST}:PORT")
+    args = parser.parse_args()
+    METRICS_ENABLED = bool(args.metrics or args.metrics_json or args.metrics_port)
+    if args.metrics_port:
+        serve_metrics(args.metrics_port)
+    if args.api_keys:
+        KEYS = KeyPool(list(dict.fromkeys(k for k in args.api_keys.split(',') if k)))
+    elif args.env_file != ENV_FILE:
+        KEYS = KeyPool(load_api_keys(args.env_file))
+    if not len(KEYS) and not args.replay:
+        raise SystemExit("✗ Aucune clé API : définir ODDS_API_KEYS ou ODDS_API_KEY "
+                         f"(environnement ou {args.env_file}), ou passer --api-keys")
+    API_BASE_URL = args.base_url.rstrip('/')
+    FETCH_ENGINE = args.engine
+    CACHE_ENABLED = args.cache or args.replay
+    CACHE_TTL = args.cache_ttl
+    REGIONS = args.regions
+    SPLIT_REGIONS = args.split_regions
+    SEARCH_MIDDLES = args.middles
+    OUTLIER_RULE = args.outlier_rule
+    SEARCH_VALUE = args.value_bets
+    # Le consensus double le coût d'analyse à froid : seulement là où il sert
+    CONSENSUS_ENABLED = args.consensus or args.value_bets or args.daemon
+    SHARP_WEIGHT = args.sharp_weight
+    MAX_EXPOSURE = args.max_exposure
+    CONSTRAINTS = BookmakerConstraints(
+        allowed=frozenset(args.bookmakers.split(',')) if args.bookmakers else None,
+        excluded=frozenset(args.exclude_bookmakers.split(',')) if args.exclude_bookmakers else frozenset(),
+        max_legs_per_bookie=args.max_legs_per_bookmaker,
+    )
+    if args.window:
+        start, _, end = args.window.partition(':')
+        COMMENCE_WINDOW = (float(start) if start else None, float(end) if end else None)
+    if args.event_ids:
+        EVENT_IDS = [e for e in args.event_ids.split(',') if e]
+    columnar = args.columnar
+    if columnar and (np is None or SEARCH_MIDDLES or SEARCH_VALUE):
+        print("   ✗ --columnar ignoré : numpy requis, middles et value bets non gérés en colonnes")
+        columnar = False
+    sinks = open_sinks(args.jsonl, args.csv, args.parquet, args.parquet_row_group)
+    if args.jsonl == '-':
+        sys.stdout = sys.stderr       # Le flux JSONL occupe stdout : messages sur stderr
+
     print("═" * 70)
     print("  📡  ARBITRAGE SPORTIF — The-Odds-API")
-    print(f"  Régions: {REGIONS}  |  Marchés: {MARKETS}  |  Mise: {TOTAL_INVESTMENT}€")
+    print(f"  Régions: {REGIONS}  |  Marchés: {MARKETS}  |  Mise: {TOTAL_INVESTMENT}€  |  Clés API: {len(KEYS)}")
     print("═" * 70)
-    print("\n🔍 Récupération des cotes en cours...\n")
 
-    events = fetch_all_sports_odds()
-    print(f"\n✅ {len(events)} événements récupérés au total.")
+    def export_metrics():
+        if args.metrics:
+            METRICS.report()
+        if args.metrics_json:
+            with open(args.metrics_json, 'w', encoding='utf-8') as f:
+                f.write(METRICS.to_json())
 
-    if not events:
-        print("❌ Aucun événement. Vérifie ta clé API ou ta connexion.")
-    else:
-        print("⚙️  Calcul des opportunités d'arbitrage...\n")
-        results = []
+    def close_sinks():
+        for sink in sinks:
+            sink.close()
 
-        for event in events:
-            markets = extract_all_odds(event)
-            for mkey, outcomes_dict in markets.items():
-                filtered = filter_outlier_odds(outcomes_dict)
-                arb = compute_arbitrage(event, mkey, filtered)
-                if arb is not None:
-                    results.append(arb)
+    if args.daemon:
+        print("\n🔁 Mode daemon — Ctrl+C pour arrêter.\n")
+        try:
+            run_daemon(sinks)
+        except KeyboardInterrupt:
+            print("\n⏹  Arrêt du daemon.")
+        finally:
+            close_sinks()
+        export_metrics()
+        raise SystemExit(0)
 
-        if not results:
-            print("😔 Aucune opportunité trouvée dans les plages configurées.")
-            print(f"   (MIN_PROFIT_PCT={MIN_PROFIT_PCT}%, MAX_PROFIT_PCT={MAX_PROFIT_PCT}%)")
+    top = TopResults()                # Top TOP_N alimenté en flux par l'étape de calcul
+    emit = fan_out(top, *sinks)       # ... comme les sorties fichier
+    keep = CONSENSUS_ENABLED          # Liste complète des résultats : seulement pour la répartition Kelly
+    try:
+        if args.replay:
+            print(f"\n💾 Replay des snapshots de {CACHE_DIR}...\n")
+            events = load_cached_events()
+            n_events, results = len(events), []
         else:
-            display_results(results)
\ No newline at end of file
+            mode = f"en colonnes (JSON : {json_backend()})" if columnar else \
+                "en streaming" if args.stream else f"(JSON : {json_backend()})"
+            print(f"\n🔍 Récupération et analyse des cotes {mode}...\n")
+            events = None
+            live = LivePrinter() if args.pipeline else None
+            n_events, results = scan_all_sports(stream=args.stream, on_result=fan_out(emit, live),
+                                                columnar=columnar, keep_results=keep)
+            if live is not None and live.first_at is not None:
+                print(f"\n⏱  Premier surebet après {live.first_at:.2f}s ({live.count} au total)")
+        print(f"\n✅ {n_events} événements récupérés au total.")
+        if len(KEYS) > 1 and not args.replay:
+            KEYS.report()
+
+        if not n_events:
+            print("❌ Aucun événement. Vérifie ta clé API ou ta connexion.")
+        else:
+            if events is not None:
+                print("⚙️  Calcul des opportunités d'arbitrage...\n")
+                for event in events:
+                    event_results = analyse_and_emit(event, extract_all_odds(event), emit)
+                    if keep:
+                        results.extend(event_results)
+
+            if not len(top):
+                print("😔 Aucune opportunité trouvée dans les plages configurées.")
+                print(f"   (MIN_PROFIT_PCT={MIN_PROFIT_PCT}%, MAX_PROFIT_PCT={MAX_PROFIT_PCT}%)")
+            else:
+                if keep:
+                    PORTFOLIO.solve(results)
+                display_results(top)
+    finally:
+        close_sinks()
+    for sink in sinks:
+        print(f"💾 {sink.count} résultat(s) écrit(s) dans {sink.path}")
+    export_metrics()
\ No newline at end of file
@@ -0,0 +1,652 @@
+"""
+Benchmarks hors réseau de arbitrage.py, sur des données générées par mock_odds_api.
+
+Les contrôles de justesse (résultats identiques à la référence) font sortir
+le processus en code 1 s'ils échouent.
+
+Usage :
+    python benchmark.py json --sports 5 --events 200 --bookmakers 40
+    python benchmark.py merge --events 200 --bookmakers 40
+    python benchmark.py columns --sports 5 --events 200 --bookmakers 40
+    python benchmark.py kernel --sports 5 --events 700 --bookmakers 20
+    python benchmark.py memory --sports 10 --events 3400 --bookmakers 10
+    python benchmark.py middles --sports 3 --events 200 --bookmakers 40
+    python benchmark.py combos --sports 3 --events 100 --bookmakers 40
+    python benchmark.py outliers --sports 5 --events 200 --bookmakers 40
+    python benchmark.py consensus --sports 5 --events 200 --bookmakers 40
+    python benchmark.py kelly --sports 5 --events 200 --bookmakers 40
+    python benchmark.py display --sports 10 --events 1000 --bookmakers 10
+    python benchmark.py sinks --sports 10 --events 1000 --bookmakers 10
+"""
+import argparse
+import contextlib
+import copy
+import io
+import gc
+import itertools
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+import arbitrage
+from mock_odds_api import REGION_LIST, generate_sport_events, sport_keys
+
+
+# ─────────────────────────────────────────────
+# OUTILS
+# ─────────────────────────────────────────────
+FAILED_CHECKS: list = []          # Contrôles de justesse en échec : code de sortie 1
+
+
+def check(ok: bool, label: str):
+    """Contrôle de justesse : affiché, et retenu comme échec s'il ne passe pas."""
+    print(f"   {'✓' if ok else '✗'} {label}")
+    if not ok:
+        FAILED_CHECKS.append(label)
+
+
+def timeit(fn, repeat: int = 3) -> float:
+    """Meilleur temps (secondes) sur `repeat` exécutions, GC désactivé pendant la mesure."""
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            t0 = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - t0)
+        finally:
+            gc.enable()
+    return best
+
+
+def make_bodies(args) -> list:
+    """Corps /odds encodés (sport, bytes), comme renvoyés par l'API."""
+    return [
+        (sport, json.dumps(generate_sport_events(sport, args.events, args.bookmakers, seed=args.seed)).encode('utf-8'))
+        for sport in sport_keys(args.sports)
+    ]
+
+
+def peak_memory(fn) -> tuple:
+    """(résultat, pic d'allocation en Mo) d'un appel, mesuré par tracemalloc."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak / 1e6
+
+
+def report(label: str, seconds: float, n_items: int, baseline: float = None, unit: str = 'événements'):
+    speedup = f"  ×{baseline / seconds:.2f}" if baseline else ""
+    print(f"   {label:<34} {seconds * 1000:9.1f} ms   {n_items / seconds:10.0f} {unit}/s{speedup}")
+
+
+# ─────────────────────────────────────────────
+# BENCH : DÉCODAGE JSON + EXTRACTION
+# ─────────────────────────────────────────────
+def bench_json(args):
+    bodies = make_bodies(args)
+    n_events = args.sports * args.events
+    size_mb = sum(len(b) for _, b in bodies) / 1e6
+    print(f"\n📦 {len(bodies)} corps /odds, {n_events} événements, {size_mb:.1f} Mo")
+
+    def stdlib_path():
+        # Chemin historique : resp.json() puis extract_all_odds sur les dicts
+        for sport, body in bodies:
+            for event in json.loads(body):
+                event['_sport'] = sport
+                arbitrage.extract_all_odds(event)
+
+    def backend_path(backend):
+        def run():
+            arbitrage.JSON_BACKEND = backend
+            for sport, body in bodies:
+                arbitrage.decode_extracted(sport, body)
+        return run
+
+    baseline = timeit(stdlib_path, args.repeat)
+    report("json.loads + extract_all_odds", baseline, n_events)
+    for backend, available in (('orjson', arbitrage.orjson), ('msgspec', arbitrage.msgspec)):
+        if available is None:
+            print(f"   {backend:<34} non installé")
+            continue
+        seconds = timeit(backend_path(backend), args.repeat)
+        report(f"{backend} (decode_extracted)", seconds, n_events, baseline)
+
+    # Contrôle : tous les backends produisent les mêmes marchés extraits
+    reference = None
+    for backend in ('json', 'orjson', 'msgspec'):
+        arbitrage.JSON_BACKEND = backend
+        if arbitrage.json_backend() != backend:
+            continue
+        extracted = [arbitrage.decode_extracted(sport, body) for sport, body in bodies]
+        if reference is None:
+            reference = extracted
+        else:
+            check(extracted == reference, f"{backend} : extraction identique au backend json")
+    arbitrage.JSON_BACKEND = 'auto'
+
+
+# ─────────────────────────────────────────────
+# BENCH : FUSION MULTI-RÉGIONS
+# ─────────────────────────────────────────────
+def bench_merge(args):
+    sport = sport_keys(1)[0]
+    print(f"\n🌍 Fusion de {args.events} événements × {args.bookmakers} bookmakers par région")
+    for n_regions in range(1, len(REGION_LIST) + 1):
+        payloads = [
+            generate_sport_events(sport, args.events, args.bookmakers, seed=args.seed, regions=[region])
+            for region in REGION_LIST[:n_regions]
+        ]
+        n_books = sum(len(e['bookmakers']) for events in payloads for e in events)
+        seconds = timeit(lambda: arbitrage.merge_region_events(payloads), args.repeat)
+        print(f"   {n_regions} région(s) : {n_books:7d} bookmakers en entrée   "
+              f"{seconds * 1000:8.2f} ms   {seconds / n_books * 1e9:6.0f} ns/bookmaker")
+
+
+# ─────────────────────────────────────────────
+# BENCH : EXTRACTION COLONNAIRE
+# ─────────────────────────────────────────────
+def make_events(args) -> list:
+    """Événements bruts (dicts) de tous les sports, '_sport' renseigné."""
+    events = []
+    for sport, body in make_bodies(args):
+        for event in json.loads(body):
+            event['_sport'] = sport
+            events.append(event)
+    return events
+
+
+def bench_columns(args):
+    if arbitrage.np is None:
+        print("   numpy non installé")
+        return
+    bodies = make_bodies(args)
+    n_events = args.sports * args.events
+    events = make_events(args)
+    print(f"\n🧮 {n_events} événements × {args.bookmakers} bookmakers")
+
+    def dict_path():
+        return [arbitrage.extract_all_odds(event) for event in events]
+
+    baseline = timeit(dict_path, args.repeat)
+    report("extract_all_odds (dicts d'Outcome)", baseline, n_events)
+    report("extract_columns (dicts bruts)", timeit(lambda: arbitrage.extract_columns(events), args.repeat),
+           n_events, baseline)
+    report(f"decode_columns ({arbitrage.json_backend()}, corps)",
+           timeit(lambda: arbitrage.decode_columns(bodies), args.repeat), n_events, baseline)
+
+    _, dict_mb = peak_memory(dict_path)
+    cols, cols_mb = peak_memory(lambda: arbitrage.extract_columns(events))
+    print(f"   {len(cols)} cotes, {cols.n_groups} marchés : pic mémoire {dict_mb:.1f} Mo (dicts) "
+          f"vs {cols_mb:.1f} Mo (colonnes, dont {cols.nbytes() / 1e6:.1f} Mo de tableaux)")
+
+
+# ─────────────────────────────────────────────
+# BENCH : NOYAU D'ARBITRAGE VECTORISÉ
+# ─────────────────────────────────────────────
+def bench_kernel(args):
+    if arbitrage.np is None:
+        print("   numpy non installé")
+        return
+    cols = arbitrage.extract_columns(make_events(args))
+    markets = list(cols.iter_markets())
+    print(f"\n⚡ {cols.n_groups} marchés, {len(cols)} cotes")
+
+    def scalar_path():
+        return [r for r in (arbitrage.compute_arbitrage(meta, mkey, arbitrage.filter_outlier_odds(outcomes), line)
+                            for meta, mkey, line, outcomes in markets) if r is not None]
+
+    baseline = timeit(scalar_path, args.repeat)
+    report("filtre + compute_arbitrage × marché", baseline, cols.n_groups, unit='marchés')
+    report("arbitrage_kernel (tableaux)", timeit(lambda: arbitrage.arbitrage_kernel(cols), args.repeat),
+           cols.n_groups, baseline, unit='marchés')
+    report("arbitrage_kernel + batch_results", timeit(lambda: arbitrage.analyse_columns(cols), args.repeat),
+           cols.n_groups, baseline, unit='marchés')
+
+    # Contrôle : résultats strictement identiques au chemin scalaire
+    scalar, batch = scalar_path(), arbitrage.analyse_columns(cols)
+    check(batch == scalar, f"{len(batch)} résultats identiques au chemin scalaire")
+
+
+# ─────────────────────────────────────────────
+# BENCH : EMPREINTE MÉMOIRE DES OUTCOMES / RÉSULTATS
+# ─────────────────────────────────────────────
+def bench_memory(args):
+    events = make_events(args)
+    min_profit = arbitrage.MIN_PROFIT_PCT
+    arbitrage.MIN_PROFIT_PCT = -100           # Un résultat par marché : mesure la représentation
+    try:
+        gc.collect()
+        tracemalloc.start()
+        extracted = [(event, arbitrage.extract_all_odds(event)) for event in events]
+        odds_bytes, _ = tracemalloc.get_traced_memory()
+        results = [r for event, markets in extracted for r in arbitrage.analyse_extracted(event, markets)]
+        total_bytes, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        arbitrage.MIN_PROFIT_PCT = min_profit
+    n_markets = sum(len(markets) for _, markets in extracted)
+    n_outcomes = sum(len(quotes) for _, markets in extracted for outcomes in markets.values()
+                     for quotes in outcomes.values())
+    results_bytes = total_bytes - odds_bytes
+    print(f"\n🧠 {n_markets} marchés, {n_outcomes} cotes, {len(results)} résultats")
+    print(f"   Outcomes extraits : {odds_bytes / 1e6:8.1f} Mo  ({odds_bytes / n_outcomes:6.1f} o/cote)")
+    print(f"   ArbitrageResult   : {results_bytes / 1e6:8.1f} Mo  ({results_bytes / max(len(results), 1):6.1f} o/résultat)")
+    print(f"   Total retenu      : {total_bytes / 1e6:8.1f} Mo")
+
+
+# ─────────────────────────────────────────────
+# BENCH : MIDDLES / SUREBETS INTER-LIGNES
+# ─────────────────────────────────────────────
+def naive_cross_lines(event, mkey, outcomes_dict) -> dict:
+    """Référence brute : produit de toutes les cotes Over × Under ; meilleure marge par ligne Under."""
+    kind = arbitrage.LINE_MARKETS[mkey]
+    quotes = [(arbitrage.line_threshold(kind, o, event.get('home_team')), o)
+              for outcomes in outcomes_dict.values() for o in outcomes]
+    overs = [(t, o) for (side, t), o in quotes if side == 'over']
+    unders = [(t, o) for (side, t), o in quotes if side == 'under']
+    best = {}
+    for (t_o, o), (t_u, u) in itertools.product(overs, unders):
+        if t_o < t_u:
+            margin = 1.0 / o.price + 1.0 / u.price
+            best[t_u] = min(best.get(t_u, margin), margin)
+    return best
+
+
+def bench_middles(args):
+    markets = [
+        (event, mkey, arbitrage.filter_outlier_odds(outcomes))
+        for event in make_events(args)
+        for mkey, outcomes in arbitrage.extract_all_odds(event).items()
+        if mkey in arbitrage.LINE_MARKETS
+    ]
+    n_quotes = sum(len(q) for _, _, outcomes in markets for q in outcomes.values())
+    print(f"\n↔️  {len(markets)} marchés spreads/totals, {n_quotes} cotes")
+
+    def sweep():
+        return [r for event, mkey, outcomes in markets for r in arbitrage.find_cross_lines(event, mkey, outcomes)]
+
+    def naive():
+        return [naive_cross_lines(event, mkey, outcomes) for event, mkey, outcomes in markets]
+
+    baseline = timeit(naive, args.repeat)
+    report("produit Over × Under (référence)", baseline, len(markets), unit='marchés')
+    report("find_cross_lines (balayage trié)", timeit(sweep, args.repeat), len(markets), baseline, unit='marchés')
+
+    # Contrôle : chaque paire retenue a la meilleure marge possible pour sa ligne Under
+    mismatches = 0
+    for event, mkey, outcomes in markets:
+        reference = naive_cross_lines(event, mkey, outcomes)
+        kind = arbitrage.LINE_MARKETS[mkey]
+        home = event.get('home_team')
+        for r in arbitrage.find_cross_lines(event, mkey, outcomes):
+            under = next(o for q in outcomes.values() for o in q
+                         if o.bookie == r.bets[1].bookie and o.name == r.bets[1].outcome and o.point == r.bets[1].point)
+            _, t_u = arbitrage.line_threshold(kind, under, home)
+            if abs(reference[t_u] - (1.0 / r.bets[0].cote + 1.0 / r.bets[1].cote)) > 1e-12:
+                mismatches += 1
+    results = sweep()
+    print(f"   {len(results)} paires ({sum(r.is_surebet for r in results)} surebets garantis)")
+    check(mismatches == 0, f"{mismatches} écart(s) avec la référence")
+
+
+# ─────────────────────────────────────────────
+# BENCH : COMBINAISONS SOUS CONTRAINTES
+# ─────────────────────────────────────────────
+def brute_force_combinations(outcomes_dict, constraints, n, k) -> list:
+    """Référence : produit complet des top-k cotes de chaque outcome, contraintes vérifiées à la fin."""
+    keys = list(outcomes_dict)
+    k = max(k, len(keys))
+    pools = [arbitrage.top_k_quotes(outcomes_dict[okey], k, constraints) for okey in keys]
+    cap = constraints.max_legs_per_bookie
+    margins = []
+    for combo in itertools.product(*pools):
+        bookies = [o.bookie for o in combo]
+        if cap is not None and max(bookies.count(b) for b in bookies) > cap:
+            continue
+        margins.append(sum(1.0 / o.price for o in combo))
+    return sorted(margins)[:n]
+
+
+def bench_combos(args):
+    markets = [
+        outcomes
+        for event in make_events(args)
+        for mkey, market in arbitrage.extract_all_odds(event).items()
+        for outcomes in arbitrage.split_lines(event, mkey, market).values()
+        if len(outcomes) >= 2
+    ]
+    bookies = sorted({o.bookie for outcomes in markets for q in outcomes.values() for o in q})
+    constraints = arbitrage.BookmakerConstraints(excluded=frozenset(bookies[::4]), max_legs_per_bookie=1)
+    k, n = 10, 3
+    print(f"\n🧩 {len(markets)} marchés, top-{k} cotes par outcome, {n} meilleures combinaisons, "
+          f"{len(constraints.excluded)} bookmakers exclus, une jambe par bookmaker")
+
+    min_profit = arbitrage.MIN_PROFIT_PCT
+    arbitrage.MIN_PROFIT_PCT = -100               # Pas d'élagage par le seuil d'affichage : pire cas
+    try:
+        baseline = timeit(lambda: [brute_force_combinations(m, constraints, n, k) for m in markets], args.repeat)
+        report("produit des top-k (référence)", baseline, len(markets), unit='marchés')
+        seconds = timeit(lambda: [arbitrage.best_combinations(m, constraints, n, k) for m in markets], args.repeat)
+        report("best_combinations (branch-and-bound)", seconds, len(markets), baseline, unit='marchés')
+        mismatches = sum(
+            [margin for margin, _ in arbitrage.best_combinations(m, constraints, n, k)]
+            != brute_force_combinations(m, constraints, n, k)
+            for m in markets
+        )
+    finally:
+        arbitrage.MIN_PROFIT_PCT = min_profit
+    check(mismatches == 0, f"{mismatches} écart(s) de marge avec la référence")
+
+
+# ─────────────────────────────────────────────
+# BENCH : FILTRE OUTLIERS PAR LOT
+# ─────────────────────────────────────────────
+def inject_outliers(events: list, rate: float, seed: int) -> int:
+    """Multiplie une fraction `rate` des cotes (erreurs de saisie bookmaker) ; retourne leur nombre."""
+    rng = random.Random(seed)
+    n = 0
+    for event in events:
+        for bm in event.get('bookmakers', []):
+            for market in bm.get('markets', []):
+                for outcome in market.get('outcomes', []):
+                    if rng.random() < rate:
+                        outcome['price'] = round(outcome['price'] * rng.choice((3.0, 10.0)), 2)
+                        n += 1
+    return n
+
+
+def bench_outliers(args):
+    if arbitrage.np is None:
+        print("   numpy non installé")
+        return
+    events = make_events(args)
+    injected = inject_outliers(events, 0.02, args.seed)
+    cols = arbitrage.extract_columns(events)
+    markets = [outcomes for _, _, _, outcomes in cols.iter_markets()]
+    order = arbitrage.np.argsort(cols.group, kind='stable')
+    bounds = arbitrage.np.searchsorted(cols.group[order], arbitrage.np.arange(cols.n_groups + 1))
+    print(f"\n🧹 {cols.n_groups} marchés, {len(cols)} cotes, {injected} cotes aberrantes injectées")
+
+    rule = arbitrage.OUTLIER_RULE
+    try:
+        for name in ('zscore', 'mad'):
+            arbitrage.OUTLIER_RULE = name
+            baseline = timeit(lambda: [arbitrage.filter_outlier_odds(m) for m in markets], args.repeat)
+            report(f"filter_outlier_odds × marché ({name})", baseline, cols.n_groups, unit='marchés')
+            seconds = timeit(lambda: arbitrage.outlier_mask(cols), args.repeat)
+            report(f"outlier_mask ({name})", seconds, cols.n_groups, baseline, unit='marchés')
+
+            # Contrôle : mêmes cotes gardées, marché par marché
+            keep = arbitrage.outlier_mask(cols)
+            mismatches = 0
+            for g, outcomes in enumerate(markets):
+                rows = order[bounds[g]:bounds[g + 1]]
+                mismatches += cols.outcomes_dict(rows[keep[rows]]) != arbitrage.filter_outlier_odds(outcomes)
+            print(f"   {len(cols) - int(keep.sum())} cotes écartées")
+            check(mismatches == 0, f"{mismatches} marché(s) en écart avec le filtre scalaire ({name})")
+    finally:
+        arbitrage.OUTLIER_RULE = rule
+
+
+# ─────────────────────────────────────────────
+# BENCH : CONSENSUS INCRÉMENTAL ENTRE DEUX POLLS
+# ─────────────────────────────────────────────
+def move_prices(events: list, rate: float, seed: int) -> int:
+    """Fait bouger une fraction `rate` des cotes (±5 %), comme entre deux polls ; retourne leur nombre."""
+    rng = random.Random(seed)
+    n = 0
+    for event in events:
+        for bm in event.get('bookmakers', []):
+            for market in bm.get('markets', []):
+                for outcome in market.get('outcomes', []):
+                    if rng.random() < rate:
+                        outcome['price'] = round(max(outcome['price'] * rng.uniform(0.95, 1.05), 1.01), 2)
+                        n += 1
+    return n
+
+
+def bench_consensus(args):
+    events = make_events(args)
+    markets = [
+        (event, mkey, line, sub_market)
+        for event in events
+        for mkey, market in arbitrage.extract_all_odds(event).items()
+        for line, sub_market in arbitrage.split_lines(event, mkey, market).items()
+    ]
+    n_quotes = sum(len(q) for *_, sub_market in markets for q in sub_market.values())
+
+    def observe_all(model):
+        for event, mkey, line, sub_market in markets:
+            model.observe_outcomes(event, mkey, line, sub_market)
+        return model
+
+    previous = observe_all(arbitrage.ConsensusModel())
+    moved = move_prices(events, 0.05, args.seed)
+    markets = [
+        (event, mkey, line, sub_market)
+        for event in events
+        for mkey, market in arbitrage.extract_all_odds(event).items()
+        for line, sub_market in arbitrage.split_lines(event, mkey, market).items()
+    ]
+    print(f"\n⚖️  {len(markets)} marchés, {n_quotes} cotes, {moved} cotes modifiées depuis le poll précédent")
+
+    baseline = timeit(lambda: observe_all(arbitrage.ConsensusModel()), args.repeat)
+    report("consensus reconstruit", baseline, n_quotes, unit='cotes')
+
+    def incremental():
+        model = arbitrage.ConsensusModel()
+        model.markets = {k: copy.deepcopy(m) for k, m in previous.markets.items()}
+        t0 = time.perf_counter()
+        observe_all(model)
+        return time.perf_counter() - t0
+    seconds = min(incremental() for _ in range(args.repeat))
+    report("consensus mis à jour (incrémental)", seconds, n_quotes, baseline, unit='cotes')
+
+    # Contrôle : mêmes probabilités justes qu'un consensus reconstruit de zéro
+    fresh, updated = observe_all(arbitrage.ConsensusModel()), observe_all(previous)
+    worst = 0.0
+    for key in fresh.markets:
+        a, b = fresh.fair_probs(*key), updated.fair_probs(*key)
+        if (a is None) != (b is None):
+            worst = float('inf')
+        elif a is not None:
+            worst = max([worst] + [abs(a[k] - b[k]) for k in a])
+    check(worst <= 1e-9, f"écart max des probabilités justes : {worst:.2e}")
+
+    consensus = arbitrage.CONSENSUS_ENABLED
+    try:
+        arbitrage.CONSENSUS_ENABLED = False
+        without = timeit(lambda: arbitrage.analyse_events(events), args.repeat)
+        report("analyse_events sans consensus", without, len(events))
+        arbitrage.CONSENSUS_ENABLED = True
+        report("analyse_events avec consensus", timeit(lambda: arbitrage.analyse_events(events), args.repeat),
+               len(events), without)
+    finally:
+        arbitrage.CONSENSUS_ENABLED = consensus
+
+
+# ─────────────────────────────────────────────
+# BENCH : KELLY SIMULTANÉ SUR TOUT LE PORTEFEUILLE
+# ─────────────────────────────────────────────
+def bench_kelly(args):
+    if arbitrage.np is None:
+        print("   numpy non installé")
+        return
+    events = make_events(args)
+    min_profit, consensus = arbitrage.MIN_PROFIT_PCT, arbitrage.CONSENSUS_ENABLED
+    arbitrage.MIN_PROFIT_PCT = -100           # Toutes les opportunités ouvertes : pire cas
+    arbitrage.CONSENSUS_ENABLED = True        # Le portefeuille a besoin des probabilités justes
+    try:
+        results = arbitrage.analyse_events(events)
+        portfolio = arbitrage.KellyPortfolio()
+        portfolio.update(results)
+        n_markets = portfolio.solve()
+        cold_iterations = portfolio.iterations
+        print(f"\n🎲 {n_markets} marchés en portefeuille, budget {arbitrage.MAX_EXPOSURE:.0%} de la bankroll, "
+              f"λ = {portfolio.lam:.4g}")
+
+        # Une évaluation de λ : boucle scalaire vs kelly_batch
+        markets = [
+            ([b.cote for b in rs[0].bets], [fair[arbitrage.outcome_key(b)] for b in rs[0].bets])
+            for key, rs in portfolio.open.items()
+            for fair in [arbitrage.CONSENSUS.fair_probs(*key)] if fair is not None
+        ]
+        width = max(len(prices) for prices, _ in markets)
+        price = arbitrage.np.ones((len(markets), width))
+        prob = arbitrage.np.zeros((len(markets), width))
+        for m, (prices, probs) in enumerate(markets):
+            price[m, :len(prices)], prob[m, :len(probs)] = prices, probs
+        lam = portfolio.lam
+        baseline = timeit(lambda: [arbitrage.kelly_allocation(p, q, lam) for p, q in markets], args.repeat)
+        report("kelly_allocation × marché", baseline, len(markets), unit='marchés')
+        report("kelly_batch (une évaluation de λ)", timeit(lambda: arbitrage.kelly_batch(price, prob, lam), args.repeat),
+               len(markets), baseline, unit='marchés')
+
+        # Re-résolution après un poll : à froid vs à chaud (λ précédent)
+        move_prices(events, 0.05, args.seed)
+        results = arbitrage.analyse_events(events)
+
+        def resolve(warm_lam):
+            portfolio.lam = warm_lam
+            portfolio.update(results)
+            return portfolio.solve()
+        warm_lam = portfolio.lam
+        cold = timeit(lambda: resolve(0.0), args.repeat)
+        cold_iterations = portfolio.iterations
+        report(f"solve à froid ({cold_iterations} évaluations)", cold, n_markets, unit='marchés')
+        warm = timeit(lambda: resolve(warm_lam), args.repeat)
+        report(f"solve à chaud ({portfolio.iterations} évaluations)", warm, n_markets, cold, unit='marchés')
+
+        staked = sum(v for rs in portfolio.open.values() for v in rs[0].kelly_stakes.values())
+        print(f"   mises Kelly engagées : {staked:.2f}€ pour un budget de "
+              f"{arbitrage.MAX_EXPOSURE * arbitrage.TOTAL_INVESTMENT:.2f}€")
+    finally:
+        arbitrage.MIN_PROFIT_PCT, arbitrage.CONSENSUS_ENABLED = min_profit, consensus
+
+
+# ─────────────────────────────────────────────
+# BENCH : TOP-K EN FLUX ET FORMATAGE DIFFÉRÉ
+# ─────────────────────────────────────────────
+def format_all(results: list) -> list:
+    """Formatage immédiat de chaque résultat (date + mises arrondies), comme avant le top-K."""
+    return [
+        (arbitrage.format_commence.__wrapped__(r.commence),
+         [(round(b.mise, 2), round(b.gain, 2)) for b in r.bets],
+         {k: round(v, 2) for k, v in r.kelly_stakes.items()})
+        for r in results
+    ]
+
+
+def bench_display(args):
+    events = make_events(args)
+    min_profit = arbitrage.MIN_PROFIT_PCT
+    arbitrage.MIN_PROFIT_PCT = -100           # Un résultat par marché
+    try:
+        results = arbitrage.analyse_events(events)
+    finally:
+        arbitrage.MIN_PROFIT_PCT = min_profit
+    k = arbitrage.TOP_N
+    print(f"\n🏁 {len(results)} résultats, top {k}")
+
+    def sort_all():
+        return sorted(results, key=lambda r: (-int(r.is_surebet), -r.profit_pct))[:k]
+
+    baseline = timeit(sort_all, args.repeat)
+    report("tri complet + tranche", baseline, len(results), unit='résultats')
+    report("TopResults (tas de K)", timeit(lambda: arbitrage.TopResults(k).extend(results), args.repeat),
+           len(results), baseline, unit='résultats')
+    baseline = timeit(lambda: format_all(results), args.repeat)
+    report("formatage de tous les résultats", baseline, len(results), unit='résultats')
+    arbitrage.format_commence.cache_clear()
+    report("formatage des K affichés", timeit(lambda: format_all(results[:k]), args.repeat),
+           len(results), baseline, unit='résultats')
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        seconds = timeit(lambda: arbitrage.display_results(arbitrage.TopResults(k).extend(results)), args.repeat)
+    report("display_results (top-K + rendu)", seconds, len(results), unit='résultats')
+
+    same = arbitrage.TopResults(k).extend(results).top() == sort_all()
+    check(same, f"top {k} identique au tri complet")
+
+
+# ─────────────────────────────────────────────
+# BENCH : SORTIES EN FLUX (JSONL / CSV / PARQUET)
+# ─────────────────────────────────────────────
+def bench_sinks(args):
+    events = make_events(args)
+    min_profit = arbitrage.MIN_PROFIT_PCT
+    arbitrage.MIN_PROFIT_PCT = -100           # Un résultat par marché
+    try:
+        results = arbitrage.analyse_events(events)
+    finally:
+        arbitrage.MIN_PROFIT_PCT = min_profit
+    print(f"\n💾 {len(results)} résultats, {sum(len(r.bets) for r in results)} jambes")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        def dump_list():
+            # Référence : liste complète d'enregistrements puis json.dump en un bloc
+            with open(os.path.join(tmp, 'results.json'), 'w', encoding='utf-8') as f:
+                json.dump([arbitrage.result_record(r) for r in results], f)
+
+        def run_sink(factory, name):
+            path = os.path.join(tmp, name)
+            if os.path.exists(path):
+                os.remove(path)
+            sink = factory(path)
+            for r in results:
+                sink(r)
+            sink.close()
+            return os.path.getsize(path)
+
+        _, peak = peak_memory(dump_list)
+        baseline = timeit(dump_list, args.repeat)
+        report(f"liste + json.dump (pic {peak:.0f} Mo)", baseline, len(results), unit='résultats')
+        sinks = [(arbitrage.JsonlSink, 'results.jsonl'), (arbitrage.CsvSink, 'results.csv')]
+        if arbitrage.pa is not None:
+            sinks.append((arbitrage.ParquetSink, 'results.parquet'))
+        else:
+            print("   pyarrow non installé : Parquet ignoré")
+        for factory, name in sinks:
+            size, peak = peak_memory(lambda: run_sink(factory, name))
+            seconds = timeit(lambda: run_sink(factory, name), args.repeat)
+            report(f"{factory.__name__} ({size / 1e6:.1f} Mo, pic {peak:.0f} Mo)", seconds, len(results),
+                   baseline, unit='résultats')
+
+
+BENCHES = {
+    'columns': bench_columns,
+    'consensus': bench_consensus,
+    'display': bench_display,
+    'combos': bench_combos,
+    'middles': bench_middles,
+    'outliers': bench_outliers,
+    'sinks': bench_sinks,
+    'kelly': bench_kelly,
+    'kernel': bench_kernel,
+    'memory': bench_memory,
+    'json': bench_json,
+    'merge': bench_merge,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks arbitrage.py (hors réseau)")
+    parser.add_argument('bench', choices=sorted(BENCHES), help="benchmark à lancer")
+    parser.add_argument('--sports', type=int, default=5)
+    parser.add_argument('--events', type=int, default=200)
+    parser.add_argument('--bookmakers', type=int, default=40)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    BENCHES[args.bench](args)
+    if FAILED_CHECKS:
+        raise SystemExit(f"✗ {len(FAILED_CHECKS)} contrôle(s) en échec")
@@ -0,0 +1,342 @@
+"""
+Serveur local imitant The-Odds-API v4, pour les benchmarks et tests de charge.
+
+Endpoints servis :
+    GET /v4/sports
+    GET /v4/sports/{sport}/odds
+    GET /v4/sports/{sport}/events/{eventId}/odds
+
+Les événements sont générés de façon déterministe (graine + clé du sport) :
+cotes "justes" tirées par événement, marge et bruit propres à chaque
+bookmaker, lignes spreads/totals légèrement décalées d'un bookmaker à l'autre.
+Latence et taux d'erreur (429 / 422 / 500) sont injectables.
+Les filtres commenceTimeFrom / commenceTimeTo / eventIds sont appliqués.
+Le quota est compté par clé API (401 une fois épuisé).
+
+Usage :
+    python mock_odds_api.py --sports 500 --events 200 --bookmakers 40 --latency 50
+    python arbitrage.py --base-url http://127.0.0.1:8000/v4
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# ─────────────────────────────────────────────
+# CONFIG PAR DÉFAUT
+# ─────────────────────────────────────────────
+SPORT_GROUPS = ['soccer', 'basketball', 'tennis', 'icehockey', 'americanfootball', 'baseball']
+THREE_WAY_GROUPS = {'soccer', 'icehockey'}     # h2h avec match nul
+REGION_LIST = ['uk', 'eu', 'us', 'au']         # bookNN appartient à REGION_LIST[NN % 4]
+MULTI_REGION_EVERY = 5                         # ... et à toutes les régions si NN % 5 == 0
+DEFAULT_QUOTA = 20000
+
+
+# ─────────────────────────────────────────────
+# GÉNÉRATEUR SYNTHÉTIQUE
+# ─────────────────────────────────────────────
+def _rng(*parts) -> random.Random:
+    """Générateur déterministe (indépendant de PYTHONHASHSEED)."""
+    return random.Random(zlib.crc32('|'.join(map(str, parts)).encode('utf-8')))
+
+
+def sport_keys(n_sports: int) -> list:
+    return [f"{SPORT_GROUPS[i % len(SPORT_GROUPS)]}_mock_{i:03d}" for i in range(n_sports)]
+
+
+def generate_sports(n_sports: int) -> list:
+    sports = []
+    for key in sport_keys(n_sports):
+        group = key.split('_')[0]
+        sports.append({
+            'key':           key,
+            'group':         group.capitalize(),
+            'title':         key.replace('_', ' ').title(),
+            'description':   'Mock league',
+            'active':        True,
+            'has_outrights': False,
+        })
+    return sports
+
+
+def _price(p: float, margin: float, rnd: random.Random, noise: float) -> float:
+    """Cote décimale d'une probabilité juste, avec marge bookmaker et bruit."""
+    price = 1.0 / (p * (1.0 + margin)) * (1.0 + rnd.gauss(0.0, noise))
+    return round(max(price, 1.01), 2)
+
+
+def _two_way(p_first: float, margin: float, rnd: random.Random, noise: float) -> tuple:
+    return (_price(p_first, margin, rnd, noise), _price(1.0 - p_first, margin, rnd, noise))
+
+
+def bookmaker_regions(k: int) -> set:
+    if k % MULTI_REGION_EVERY == 0:
+        return set(REGION_LIST)
+    return {REGION_LIST[k % len(REGION_LIST)]}
+
+
+def generate_event(sport: str, index: int, n_bookmakers: int, markets: set,
+                   seed: int = 0, tick: int = 0, noise: float = 0.02, regions=None) -> dict:
+    """
+    Un événement au format The-Odds-API. `tick` fait dériver les cotes
+    d'un poll à l'autre sans changer les équipes, dates ni lignes.
+    """
+    rnd = _rng(seed, sport, index)
+    group = sport.split('_')[0]
+    home, away = f"Team {sport[-3:]}-{2 * index}", f"Team {sport[-3:]}-{2 * index + 1}"
+    commence = datetime.now(timezone.utc) + timedelta(minutes=rnd.randint(-90, 7 * 24 * 60))
+
+    # Probabilités justes de l'événement
+    p_home = rnd.uniform(0.2, 0.7)
+    p_draw = rnd.uniform(0.2, 0.3) if group in THREE_WAY_GROUPS else 0.0
+    p_away = 1.0 - p_home - p_draw
+    spread = rnd.choice([-2.5, -1.5, -0.5, 0.5, 1.5]) if p_home > 0.45 else rnd.choice([0.5, 1.5, 2.5])
+    total = rnd.choice([1.5, 2.5, 3.5, 4.5]) if group in THREE_WAY_GROUPS else rnd.choice([140.5, 160.5, 210.5])
+
+    bookmakers = []
+    for k in range(n_bookmakers):
+        if regions is not None and not bookmaker_regions(k) & regions:
+            continue
+        brnd = _rng(seed, sport, index, k, tick)
+        margin = brnd.uniform(0.02, 0.09)
+        shift = brnd.choice([0.0, 0.0, 0.0, -0.5, 0.5, -1.0, 1.0])
+        last_update = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        mlist = []
+        if 'h2h' in markets:
+            outcomes = [
+                {'name': home, 'price': _price(p_home, margin, brnd, noise)},
+                {'name': away, 'price': _price(p_away, margin, brnd, noise)},
+            ]
+            if p_draw:
+                outcomes.append({'name': 'Draw', 'price': _price(p_draw, margin, brnd, noise)})
+            mlist.append({'key': 'h2h', 'last_update': last_update, 'outcomes': outcomes})
+        if 'spreads' in markets:
+            point = spread + shift
+            p_cover = min(max(0.5 + 0.06 * shift, 0.05), 0.95)
+            ph, pa = _two_way(p_cover, margin, brnd, noise)
+            mlist.append({'key': 'spreads', 'last_update': last_update, 'outcomes': [
+                {'name': home, 'price': ph, 'point': point},
+                {'name': away, 'price': pa, 'point': -point},
+            ]})
+        if 'totals' in markets:
+            point = total + shift
+            p_over = min(max(0.5 - 0.08 * shift, 0.05), 0.95)
+            po, pu = _two_way(p_over, margin, brnd, noise)
+            mlist.append({'key': 'totals', 'last_update': last_update, 'outcomes': [
+                {'name': 'Over', 'price': po, 'point': point},
+                {'name': 'Under', 'price': pu, 'point': point},
+            ]})
+        bookmakers.append({
+            'key':         f"book{k:02d}",
+            'title':       f"Book {k:02d}",
+            'last_update': last_update,
+            'markets':     mlist,
+        })
+
+    return {
+        'id':            f"{zlib.crc32(f'{sport}|{index}'.encode()):08x}{index:08x}",
+        'sport_key':     sport,
+        'sport_title':   sport.replace('_', ' ').title(),
+        'commence_time': commence.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'home_team':     home,
+        'away_team':     away,
+        'bookmakers':    bookmakers,
+    }
+
+
+def generate_sport_events(sport: str, n_events: int, n_bookmakers: int,
+                          markets=('h2h', 'spreads', 'totals'), seed: int = 0,
+                          tick: int = 0, regions=None) -> list:
+    """
+    Tous les événements d'un sport (utilisable directement dans les benchmarks).
+    `regions` restreint les bookmakers à ceux des régions demandées (None = tous).
+    """
+    markets = set(markets)
+    regions = set(regions) if regions is not None else None
+    return [generate_event(sport, i, n_bookmakers, markets, seed, tick, regions=regions)
+            for i in range(n_events)]
+
+
+# ─────────────────────────────────────────────
+# SERVEUR HTTP
+# ─────────────────────────────────────────────
+class MockState:
+    """Paramètres du serveur, compteurs de quota par clé API et cache des corps JSON."""
+
+    def __init__(self, args):
+        self.args = args
+        self.sports = generate_sports(args.sports)
+        self.sport_set = {s['key'] for s in self.sports}
+        self.lock = threading.Lock()
+        self.used: dict = {}          # apiKey -> unités consommées
+        self.bodies: OrderedDict = OrderedDict()
+
+    def quota(self, key: str) -> tuple:
+        with self.lock:
+            used = self.used.get(key, 0)
+        return used, max(self.args.quota - used, 0)
+
+    def spend(self, key: str, cost: int) -> tuple:
+        with self.lock:
+            used = self.used[key] = self.used.get(key, 0) + cost
+            return used, max(self.args.quota - used, 0)
+
+    def sport_events(self, sport: str, markets: tuple, regions: tuple) -> tuple:
+        """(événements, corps JSON non filtré) d'un sport, gardés en cache LRU."""
+        tick = int(time.time() // self.args.drift) if self.args.drift > 0 else 0
+        key = (sport, markets, regions, tick)
+        with self.lock:
+            entry = self.bodies.get(key)
+            if entry is not None:
+                self.bodies.move_to_end(key)
+                return entry
+        events = generate_sport_events(sport, self.args.events, self.args.bookmakers,
+                                       markets, self.args.seed, tick, regions)
+        entry = (events, json.dumps(events).encode('utf-8'))
+        with self.lock:
+            self.bodies[key] = entry
+            while len(self.bodies) > self.args.body_cache:
+                self.bodies.popitem(last=False)
+        return entry
+
+    def odds_body(self, sport: str, markets: tuple, regions: tuple, query: dict) -> tuple:
+        """Corps /odds après filtres commenceTime*/eventIds ; retourne (corps, nb événements)."""
+        events, body = self.sport_events(sport, markets, regions)
+        start = query.get('commenceTimeFrom', [None])[0]
+        end = query.get('commenceTimeTo', [None])[0]
+        ids = query.get('eventIds', [None])[0]
+        if not (start or end or ids):
+            return body, len(events)
+        ids = set(ids.split(',')) if ids else None
+        # Format ISO 'YYYY-MM-DDTHH:MM:SSZ' : l'ordre lexicographique suffit
+        kept = [
+            e for e in events
+            if (start is None or e['commence_time'] >= start)
+            and (end is None or e['commence_time'] <= end)
+            and (ids is None or e['id'] in ids)
+        ]
+        return json.dumps(kept).encode('utf-8'), len(kept)
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    state: MockState = None
+    protocol_version = 'HTTP/1.1'     # keep-alive
+
+    def log_message(self, fmt, *args):
+        if self.state.args.verbose:
+            super().log_message(fmt, *args)
+
+    def _send(self, status: int, body: bytes, headers: dict = None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, str(v))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, message: str, headers: dict = None):
+        self._send(status, json.dumps({'message': message}).encode('utf-8'), headers)
+
+    def do_GET(self):
+        args = self.state.args
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        parts = [p for p in url.path.split('/') if p]
+
+        if args.latency:
+            time.sleep(max(random.gauss(args.latency, args.latency * 0.2), 0.0) / 1000.0)
+
+        key = query.get('apiKey', [''])[0]
+        used, remaining = self.state.quota(key)
+        quota_headers = {'x-requests-used': used, 'x-requests-remaining': remaining, 'x-requests-last': 0}
+        if not key:
+            return self._error(401, 'Missing apiKey', quota_headers)
+
+        if parts == ['v4', 'sports']:
+            body = json.dumps(self.state.sports).encode('utf-8')
+            return self._send(200, body, quota_headers)
+
+        if len(parts) == 4 and parts[:2] == ['v4', 'sports'] and parts[3] == 'odds':
+            sport = parts[2]
+            if sport not in self.state.sport_set:
+                return self._error(404, f"Unknown sport {sport}", quota_headers)
+            if remaining <= 0:
+                return self._error(401, 'Usage quota has been reached', quota_headers)
+            if random.random() < args.error_rate:
+                status = random.choice([429, 422, 500])
+                headers = dict(quota_headers)
+                if status == 429:
+                    headers['Retry-After'] = 1
+                return self._error(status, 'Injected error', headers)
+            markets = tuple(sorted(query.get('markets', ['h2h'])[0].split(',')))
+            regions = tuple(sorted(query.get('regions', ['uk'])[0].split(',')))
+            body, n_events = self.state.odds_body(sport, markets, regions, query)
+            cost = len(markets) * len(regions) if n_events else 0
+            used, remaining = self.state.spend(key, cost)
+            return self._send(200, body, {
+                'x-requests-used': used, 'x-requests-remaining': remaining, 'x-requests-last': cost,
+            })
+
+        if len(parts) == 6 and parts[:2] == ['v4', 'sports'] and parts[3] == 'events' and parts[5] == 'odds':
+            sport, event_id = parts[2], parts[4]
+            if sport not in self.state.sport_set:
+                return self._error(404, f"Unknown sport {sport}", quota_headers)
+            markets = tuple(sorted(query.get('markets', ['h2h'])[0].split(',')))
+            regions = tuple(sorted(query.get('regions', ['uk'])[0].split(',')))
+            events, _ = self.state.sport_events(sport, markets, regions)
+            event = next((e for e in events if e['id'] == event_id), None)
+            if event is None:
+                return self._error(404, 'Event not found', quota_headers)
+            if remaining <= 0:
+                return self._error(401, 'Usage quota has been reached', quota_headers)
+            cost = len(markets) * len(regions)
+            used, remaining = self.state.spend(key, cost)
+            return self._send(200, json.dumps(event).encode('utf-8'), {
+                'x-requests-used': used, 'x-requests-remaining': remaining, 'x-requests-last': cost,
+            })
+
+        return self._error(404, 'Not found', quota_headers)
+
+
+def make_server(args) -> ThreadingHTTPServer:
+    MockHandler.state = MockState(args)
+    server = ThreadingHTTPServer((args.host, args.port), MockHandler)
+    server.daemon_threads = True
+    return server
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Mock local de The-Odds-API v4")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--sports', type=int, default=70, help="nombre de sports actifs")
+    parser.add_argument('--events', type=int, default=20, help="événements par sport")
+    parser.add_argument('--bookmakers', type=int, default=10, help="bookmakers par événement")
+    parser.add_argument('--latency', type=float, default=0.0, help="latence moyenne injectée (ms)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="proportion de réponses /odds en erreur")
+    parser.add_argument('--quota', type=int, default=DEFAULT_QUOTA, help="quota initial simulé par clé API")
+    parser.add_argument('--drift', type=float, default=30.0,
+                        help="les cotes changent toutes les N secondes (0 = figées)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--body-cache', type=int, default=64, help="corps JSON gardés en mémoire")
+    parser.add_argument('--verbose', action='store_true')
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    server = make_server(args)
+    print(f"🧪 Mock The-Odds-API sur http://{args.host}:{args.port}/v4  "
+          f"({args.sports} sports × {args.events} événements × {args.bookmakers} bookmakers)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⏹  Arrêt du mock.")
+        server.server_close()